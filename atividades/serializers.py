@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from core.serializers import DynamicFieldsModelSerializer
+
 from pracas.serializers import PracaListSerializer
 from .models import Agenda
 from .models import Ocorrencia
@@ -46,11 +48,14 @@ class OcorrenciaSerializer(serializers.ModelSerializer):
         read_only_fields = ('event',)
 
 
-class AgendaDetailSerializer(serializers.ModelSerializer):
+class AgendaDetailSerializer(DynamicFieldsModelSerializer):
     url = serializers.SerializerMethodField(read_only=True)
     ocorrencia = OcorrenciaSerializer()
     praca_detail = PracaListSerializer(source='praca',read_only=True)
 
+    field_columns = {'url': ()}
+    expandable_fields = ('praca_detail',)
+
     def get_url(self, obj):
         return obj.get_absolute_url()
 
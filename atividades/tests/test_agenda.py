@@ -49,7 +49,7 @@ def test_return_a_list_with_5_events(client):
     response = client.get(agenda_list_url)
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 5
+    assert len(response.data['results']) == 5
 
 
 def test_return_event_properties(client):
@@ -103,13 +103,13 @@ def test_return_events_related_with_a_Praca(client):
         reverse('atividades:agenda-list') + '?praca={}'.format(praca1.id_pub))
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.data[0]['praca'] == praca1.id_pub
+    assert response.data['results'][0]['praca'] == praca1.id_pub
 
     response = client.get(
         reverse('atividades:agenda-list') + '?praca={}'.format(praca2.id_pub))
 
     assert response.status_code == status.HTTP_200_OK
-    assert response.data[0]['praca'] == praca2.id_pub
+    assert response.data['results'][0]['praca'] == praca2.id_pub
 
 
 def test_get_all_ocurrances_from_a_month(client):
@@ -130,7 +130,7 @@ def test_get_all_ocurrances_from_a_month(client):
         reverse('atividades:agenda-list') + '?mes=3&ano=2012')
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
+    assert len(response.data['results']) == 1
 
 
 def test_return_JSON_list_with_occurencies_from_an_event(client):
@@ -1,3 +1,5 @@
+from django.db.models import Prefetch
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
@@ -5,6 +7,8 @@ from rest_framework.viewsets import ViewSet
 
 from core.views import DefaultMixin
 
+from pracas.models import Praca
+
 from .models import Agenda
 from .models import Relatorio
 from .models import RelatorioImagem
@@ -18,10 +22,19 @@ class AgendaViewSet(DefaultMixin, ModelViewSet):
 
     serializer_class = AgendaDetailSerializer
     partial = True
-    queryset = Agenda.objects.all()
+    queryset = Agenda.objects.select_related('ocorrencia')
 
     filter_fields = ('praca',)
 
+    def get_queryset(self):
+        queryset = super(AgendaViewSet, self).get_queryset()
+        expand = self.get_requested_expand()
+        if expand is None or 'praca_detail' in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch('praca',
+                         queryset=Praca.objects.with_current_management()))
+        return queryset
+
 
 class RelatorioViewSet(DefaultMixin, ViewSet):
 
@@ -109,6 +109,9 @@ class User(AbstractBaseUser, IdPubIdentifier):
 
     class Meta:
         ordering = ['full_name']
+        indexes = [
+            models.Index(fields=['full_name', 'id_pub']),
+        ]
 
     def __str__(self):
         return str("{} - {}").format(self.sub, self.full_name)
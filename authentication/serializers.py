@@ -2,13 +2,17 @@ from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
 
+from core.serializers import DynamicFieldsModelSerializer
+
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsModelSerializer):
     praca_manager = serializers.URLField(
         source='is_praca_manager', read_only=True)
 
+    field_columns = {'praca_manager': ()}
+
     class Meta:
         model = User
         exclude = ('password', )
@@ -122,7 +122,7 @@ def test_getting_all_users_as_MinC_manager(_admin_user, client):
 
     assert response.status_code == status.HTTP_200_OK
     assert 'email' in str(response.content)
-    assert len(response.data) == 4
+    assert len(response.data['results']) == 4
 
 
 def test_return_only_own_information_as_common_user(_common_user, client):
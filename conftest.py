@@ -0,0 +1,14 @@
+import pytest
+
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """
+    Limpa os caches entre os testes, já que o cache em memória local não
+    acompanha o rollback do banco de dados.
+    """
+    yield
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,42 @@
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def generation_key(name):
+    return 'geracao:' + name
+
+
+def is_shared_cache(alias='default'):
+    """
+    Retorna se o conteúdo do cache é visto pelos demais processos, como os
+    comandos de gerenciamento executados fora do servidor.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def current_generations(names, alias='default'):
+    """
+    Retorna o identificador atual de cada geração, criando as que ainda não
+    existirem no cache.
+    """
+    cache = caches[alias]
+    keys = [generation_key(name) for name in names]
+
+    generations = cache.get_many(keys)
+    for key in set(keys) - set(generations):
+        cache.add(key, uuid.uuid4().hex, None)
+        generations[key] = cache.get(key)
+
+    return [generations[key] for key in keys]
+
+
+def invalidate_cache_generations(*names, alias='default'):
+    """
+    Invalida as respostas em cache associadas às gerações informadas,
+    substituindo o identificador de cada geração.
+    """
+    caches[alias].set_many(
+        {generation_key(name): uuid.uuid4().hex for name in names}, None)
@@ -0,0 +1,32 @@
+from django.db import connection
+
+from psycopg2.extras import execute_values
+
+
+def bulk_update(model, fields, rows):
+    """
+    Atualiza os campos informados de vários registros em um único
+    `UPDATE ... FROM (VALUES ...)`, sem disparar os signals dos models.
+    `rows` contém tuplas no formato (pk, valor de cada campo).
+    """
+    if not rows:
+        return
+
+    opts = model._meta
+    qn = connection.ops.quote_name
+    fields = [opts.pk] + [opts.get_field(name) for name in fields]
+    columns = [qn(field.column) for field in fields]
+
+    sql = ('UPDATE {table} AS t SET {assignments} FROM (VALUES %s) '
+           'AS v ({columns}) WHERE t.{pk} = v.{pk}').format(
+        table=qn(opts.db_table),
+        assignments=', '.join('{0} = v.{0}'.format(column)
+                              for column in columns[1:]),
+        columns=', '.join(columns),
+        pk=columns[0])
+    # Os tipos são explicitos porque colunas só com NULL seriam texto
+    template = '({})'.format(', '.join(
+        '%s::{}'.format(field.db_type(connection)) for field in fields))
+
+    with connection.cursor() as cursor:
+        execute_values(cursor.cursor, sql, rows, template=template)
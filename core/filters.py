@@ -0,0 +1,96 @@
+import math
+
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.db.models import DecimalField
+from django.db.models import F
+from django.db.models.functions import Cast
+
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .functions import Distance
+from .functions import bounding_box
+from .models import TEXT_SEARCH_CONFIG
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Busca através do parâmetro `?search=`. Views que definem
+    `search_vector_field` utilizam a busca textual do Postgres (sem acentos,
+    por radicais e ordenada por relevância); as demais mantêm a busca por
+    `search_fields` do SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field = getattr(view, 'search_vector_field', None)
+        terms = ' '.join(self.get_search_terms(request))
+        if not field or not terms:
+            return super(FullTextSearchFilter, self).filter_queryset(
+                request, queryset, view)
+
+        query = SearchQuery(terms, config=TEXT_SEARCH_CONFIG)
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        # A relevância é arredondada em uma coluna numeric, cujo valor é
+        # representado exatamente no cursor da paginação
+        return queryset.annotate(
+            rank=Cast(SearchRank(F(field), query),
+                      DecimalField(max_digits=12, decimal_places=8)),
+        ).filter(**{field: query}).order_by('-rank', *ordering)
+
+
+class ProximityFilter(filters.BaseFilterBackend):
+    """
+    Restringe os resultados ao raio em quilômetros (`?raio_km=`) da
+    coordenada informada (`?lat=&long=`), ordenando-os pela distância. Views
+    que definem `proximity_fields` (colunas de latitude e longitude) aceitam
+    o filtro.
+
+    Os candidatos são selecionados por uma bbox, que utiliza o índice sobre
+    (lat, long), e depois filtrados pela distância exata.
+
+    A distância é arredondada ao milimetro em uma coluna numeric, cujo valor
+    é representado exatamente no cursor da paginação.
+    """
+    distance_field = 'distancia'
+
+    def get_origin(self, request):
+        params = request.query_params
+        if not {'lat', 'long', 'raio_km'}.intersection(params):
+            return None
+
+        message = 'Informe lat=<graus>, long=<graus> e raio_km=<km> válidos'
+        try:
+            lat, long, raio = (float(params[name])
+                               for name in ('lat', 'long', 'raio_km'))
+        except (KeyError, ValueError):
+            raise ValidationError(message)
+
+        # As comparações com NaN são falsas e rejeitam o valor
+        if not (-90 <= lat <= 90 and -180 <= long <= 180 and
+                0 < raio < math.inf):
+            raise ValidationError(message)
+        return lat, long, raio * 1000
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'proximity_fields', None)
+        origin = fields and self.get_origin(request)
+        if not origin:
+            return queryset
+
+        lat, long, radius = origin
+        lat_field, long_field = fields
+
+        lats, longs = bounding_box(lat, long, radius)
+        bbox = {lat_field + '__range': lats}
+        if longs:
+            bbox[long_field + '__range'] = longs
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.filter(**bbox).annotate(**{
+            self.distance_field: Cast(
+                Distance(lat_field, long_field, lat, long),
+                DecimalField(max_digits=12, decimal_places=3)),
+        }).filter(**{
+            self.distance_field + '__lte': radius,
+        }).order_by(self.distance_field, *ordering)
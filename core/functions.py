@@ -0,0 +1,71 @@
+import math
+
+from django.db.models import Aggregate
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import Func
+
+# Raio médio da Terra, em metros
+EARTH_RADIUS = 6371008.8
+
+
+def bounding_box(lat, long, radius):
+    """
+    Retorna os intervalos de latitude e de longitude, em graus, que contêm
+    todos os pontos a até `radius` metros da coordenada. A longitude deixa de
+    ser restringida (None) quando o raio alcança um dos polos ou o
+    antimeridiano.
+    """
+    # Graus de latitude correspondentes ao raio; a longitude varia com o
+    # cosseno da latitude
+    delta = math.degrees(radius / EARTH_RADIUS)
+    cos = math.cos(math.radians(min(abs(lat) + delta, 90)))
+    longs = None
+    if cos > 0 and abs(long) + delta / cos < 180:
+        longs = (long - delta / cos, long + delta / cos)
+    return (lat - delta, lat + delta), longs
+
+
+class Distance(Func):
+    """
+    Distância em metros (fórmula de haversine) entre as colunas de latitude
+    e longitude informadas e a coordenada de origem.
+    """
+    template = (
+        '2 * %(radius)s * ASIN(SQRT(LEAST(1, '
+        'POWER(SIN(RADIANS(%(lat)s - %%s) / 2), 2) + '
+        'COS(RADIANS(%%s)) * COS(RADIANS(%(lat)s)) * '
+        'POWER(SIN(RADIANS(%(long)s - %%s) / 2), 2))))'
+    )
+
+    def __init__(self, lat_field, long_field, lat, long, **extra):
+        self.origin = (float(lat), float(long))
+        super(Distance, self).__init__(
+            F(lat_field), F(long_field), output_field=FloatField(), **extra)
+
+    def as_sql(self, compiler, connection):
+        (lat, lat_params), (long, long_params) = [
+            compiler.compile(expression)
+            for expression in self.source_expressions]
+
+        sql = self.template % {
+            'radius': EARTH_RADIUS,
+            'lat': 'CAST({} AS double precision)'.format(lat),
+            'long': 'CAST({} AS double precision)'.format(long),
+        }
+        lat0, long0 = self.origin
+        # Parâmetros na ordem em que aparecem no template
+        return sql, (list(lat_params) + [lat0, lat0] + list(lat_params) +
+                     list(long_params) + [long0])
+
+
+class Median(Aggregate):
+    """
+    Mediana (percentil 50 contínuo) dos valores da expressão
+    """
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(0.5) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, **extra):
+        super(Median, self).__init__(
+            expression, output_field=FloatField(), **extra)
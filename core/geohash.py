@@ -0,0 +1,82 @@
+import math
+
+from .functions import EARTH_RADIUS
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precisão armazenada nos modelos: células de aproximadamente 5m x 5m
+GEOHASH_PRECISION = 9
+
+# Metros por grau de latitude
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def encode(lat, long, precision=GEOHASH_PRECISION):
+    """
+    Retorna o geohash da coordenada com a quantidade de caracteres informada
+    """
+    lat_range, long_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash = []
+    bits = count = 0
+    even = True
+
+    while len(geohash) < precision:
+        interval, value = (long_range, long) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            interval[0] = middle
+        else:
+            bits = bits * 2
+            interval[1] = middle
+
+        even = not even
+        count += 1
+        if count == 5:
+            geohash.append(BASE32[bits])
+            bits = count = 0
+
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """
+    Retorna a altura e a largura, em graus, das células com a precisão
+    informada
+    """
+    lat_bits = 5 * precision // 2
+    long_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** long_bits
+
+
+def precision_for(lat, radius):
+    """
+    Retorna a maior precisão cujas células medem ao menos `radius` metros em
+    cada direção na latitude informada, de forma que a célula da coordenada e
+    as suas vizinhas cubram todo o raio.
+    """
+    # A largura das células diminui com a latitude: usa a mais distante do
+    # equador alcançada pelo raio
+    farthest = abs(lat) + radius / METERS_PER_DEGREE
+    cos = math.cos(math.radians(min(farthest, 89.9)))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if min(height, width * cos) * METERS_PER_DEGREE >= radius:
+            return precision
+    return 1
+
+
+def neighbors(lat, long, precision):
+    """
+    Retorna o geohash da célula da coordenada e das oito células vizinhas
+    """
+    height, width = cell_size(precision)
+    cells = set()
+    for lat_offset in (-height, 0, height):
+        neighbor_lat = lat + lat_offset
+        if not -90 <= neighbor_lat <= 90:
+            continue
+        for long_offset in (-width, 0, width):
+            neighbor_long = (long + long_offset + 180) % 360 - 180
+            cells.add(encode(neighbor_lat, neighbor_long, precision))
+    return sorted(cells)
@@ -0,0 +1,24 @@
+def accepts_gzip(request):
+    """
+    Retorna se o cliente aceita respostas compactadas com gzip, de acordo com
+    os valores de qualidade (`q`) do cabeçalho Accept-Encoding. Uma menção
+    explícita ao gzip prevalece sobre o curinga `*`.
+    """
+    accepted = {}
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    for name in ('gzip', 'x-gzip', '*'):
+        if name in accepted:
+            return accepted[name] > 0
+    return False
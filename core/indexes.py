@@ -0,0 +1,19 @@
+from django.contrib.postgres.indexes import GinIndex
+
+
+class TrigramIndex(GinIndex):
+    """
+    Índice GIN com a classe de operadores `gin_trgm_ops` (extensão pg_trgm),
+    utilizado nas buscas por similaridade e em filtros `icontains`.
+    """
+    suffix = 'trgm'
+    max_name_length = 31
+
+    def get_sql_create_template_values(self, model, schema_editor, using):
+        parameters = super(TrigramIndex, self).get_sql_create_template_values(
+            model, schema_editor, using)
+        parameters['columns'] = ', '.join(
+            '{} gin_trgm_ops'.format(schema_editor.quote_name(
+                model._meta.get_field(field_name).column))
+            for field_name, order in self.fields_orders)
+        return parameters
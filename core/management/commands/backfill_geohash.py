@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pracas.clusters import POINT_MODELS
+from pracas.proximity import update_geohashes
+
+
+class Command(BaseCommand):
+    help = ('Preenche o geohash das Praças, atores e parceiros a partir das '
+            'suas coordenadas')
+
+    def handle(self, *args, **kwargs):
+        for tipo, model in POINT_MODELS:
+            total = update_geohashes(model)
+            self.stdout.write(self.style.SUCCESS(
+                '{}: {} registros atualizados'.format(
+                    model._meta.label, total)))
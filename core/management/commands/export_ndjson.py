@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+
+EXPORT_MODELS = (
+    'pracas.Praca',
+    'gestor.Gestor',
+    'gestor.ProcessoVinculacao',
+    'atividades.Agenda',
+    'atividades.Ocorrencia',
+    'atividades.Relatorio',
+    'pracas.Rh',
+    'pracas.Ator',
+    'pracas.Parceiro',
+    'pracas.GrupoGestor',
+    'pracas.MembroGestor',
+    'authentication.User',
+)
+
+# Campos que não devem deixar o banco de dados
+EXCLUDED_FIELDS = {
+    'authentication.User': ('password', ),
+}
+
+
+def pk_ranges(model, chunk_size):
+    """
+    Divide a tabela em intervalos de chave primária com até `chunk_size`
+    registros, percorrendo apenas a coluna da chave com um cursor do lado do
+    servidor.
+    """
+    bounds = []
+    pks = model.objects.order_by('pk').values_list('pk', flat=True)
+    for position, pk in enumerate(pks.iterator()):
+        if position % chunk_size == 0:
+            bounds.append(pk)
+
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def export_chunk(label, lower, upper, path):
+    """
+    Serializa os registros com chave primária no intervalo [lower, upper) em
+    um arquivo NDJSON compactado, retornando o total de registros.
+    """
+    if not apps.ready:
+        django.setup()
+
+    model = apps.get_model(label)
+    excluded = EXCLUDED_FIELDS.get(label, ())
+    fields = [field.name for field in model._meta.concrete_fields +
+              model._meta.many_to_many
+              if field.name not in excluded and not field.primary_key]
+
+    queryset = model.objects.order_by('pk').filter(pk__gte=lower)
+    if upper is not None:
+        queryset = queryset.filter(pk__lt=upper)
+
+    total = 0
+    try:
+        with gzip.open(path, 'wt', encoding='utf-8') as output:
+            for obj in queryset.iterator():
+                data = serializers.serialize('python', [obj], fields=fields)
+                output.write(json.dumps(data[0], cls=DjangoJSONEncoder,
+                                        ensure_ascii=False))
+                output.write('\n')
+                total += 1
+    finally:
+        connections.close_all()
+
+    return total
+
+
+class Command(BaseCommand):
+    help = ('Exporta todas as entidades em arquivos NDJSON compactados, '
+            'divididos por intervalos de chave primária')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **kwargs):
+        output = kwargs['output']
+
+        tasks = []
+        for label in EXPORT_MODELS:
+            model = apps.get_model(label)
+            directory = os.path.join(output, label.lower())
+            os.makedirs(directory, exist_ok=True)
+
+            for index, (lower, upper) in enumerate(
+                    pk_ranges(model, kwargs['chunk_size'])):
+                path = os.path.join(
+                    directory, '{:05d}.ndjson.gz'.format(index))
+                tasks.append((label, lower, upper, path))
+
+        # As conexões não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=kwargs['workers']) as pool:
+            futures = [pool.submit(export_chunk, *task) for task in tasks]
+            totals = [future.result() for future in futures]
+
+        manifest = {
+            'gerado_em': timezone.now().isoformat(),
+            'modelos': {label: {'arquivos': [], 'registros': 0}
+                        for label in EXPORT_MODELS},
+        }
+        for (label, lower, upper, path), total in zip(tasks, totals):
+            modelo = manifest['modelos'][label]
+            modelo['arquivos'].append({
+                'arquivo': os.path.relpath(path, output),
+                'registros': total,
+            })
+            modelo['registros'] += total
+
+        with open(os.path.join(output, 'manifest.json'), 'w') as arquivo:
+            json.dump(manifest, arquivo, indent=2)
+
+        self.stdout.write(self.style.SUCCESS('{} registros exportados'.format(
+            sum(totals))))
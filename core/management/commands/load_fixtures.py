@@ -0,0 +1,133 @@
+import json
+
+from collections import OrderedDict
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+from django.db import transaction
+
+from pracas.derived import rebuild_derived_data
+
+CHUNK_SIZE = 64 * 1024
+
+BATCH_SIZE = 500
+
+
+def iter_fixture(stream):
+    """
+    Percorre os objetos de uma fixture JSON (uma lista no nivel superior)
+    lendo o arquivo em blocos, sem carregar o documento inteiro na memória.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise CommandError('A fixture deve conter uma lista JSON')
+            started = True
+            buffer = buffer[1:].lstrip(' \t\r\n')
+        if started and buffer.startswith(']'):
+            return
+
+        if buffer:
+            try:
+                obj, end = decoder.raw_decode(buffer)
+            except ValueError:
+                if eof:
+                    raise CommandError('Fixture JSON inválida ou incompleta')
+            else:
+                yield obj
+                buffer = buffer[end:]
+                continue
+
+        if eof:
+            raise CommandError('Fixture JSON inválida ou incompleta')
+        chunk = stream.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+
+def dependency_order(models):
+    """
+    Ordena os modelos de forma que os referenciados por chaves estrangeiras
+    sejam inseridos antes dos que os referenciam.
+    """
+    pending = list(models)
+    ordered = []
+    while pending:
+        for model in pending:
+            dependencies = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model}
+            if not dependencies & (set(pending) - {model}):
+                break
+        else:
+            raise CommandError('Dependência circular entre {}'.format(
+                ', '.join(model._meta.label for model in pending)))
+        pending.remove(model)
+        ordered.append(model)
+    return ordered
+
+
+class Command(BaseCommand):
+    help = ('Carrega fixtures JSON em lote, sem disparar os signals dos '
+            'modelos, reconstruindo os dados derivados ao final')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', type=str)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **kwargs):
+        objects = OrderedDict()
+        for path in kwargs['fixtures']:
+            with open(path, encoding='utf-8') as fixture:
+                for data in iter_fixture(fixture):
+                    for obj in serializers.deserialize(
+                            'python', [data], ignorenonexistent=True):
+                        objects.setdefault(type(obj.object), []).append(obj)
+
+        totals = OrderedDict()
+        with transaction.atomic():
+            for model in dependency_order(objects):
+                totals[model] = self.insert(
+                    model, objects[model], kwargs['batch_size'])
+
+            # Chaves informadas explicitamente não avançam as sequências
+            statements = connection.ops.sequence_reset_sql(
+                no_style(), list(objects))
+            if statements:
+                with connection.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql)
+
+            rebuild_derived_data()
+
+        for model, (inserted, skipped) in totals.items():
+            self.stdout.write('{}: {} incluídos, {} já existentes'.format(
+                model._meta.label, inserted, skipped))
+        self.stdout.write(self.style.SUCCESS('{} registros carregados'.format(
+            sum(inserted for inserted, skipped in totals.values()))))
+
+    def insert(self, model, objects, batch_size):
+        """
+        Insere com `bulk_create` os objetos ainda não existentes no banco,
+        retornando as quantidades de registros incluídos e ignorados.
+        """
+        pks = [obj.object.pk for obj in objects]
+        existing = set()
+        for start in range(0, len(pks), batch_size):
+            existing.update(model._base_manager.filter(
+                pk__in=pks[start:start + batch_size]).values_list(
+                    'pk', flat=True))
+
+        new = [obj for obj in objects if obj.object.pk not in existing]
+        model._base_manager.bulk_create(
+            [obj.object for obj in new], batch_size=batch_size)
+
+        return len(new), len(objects) - len(new)
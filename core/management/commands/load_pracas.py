@@ -1,18 +1,179 @@
 #coding: utf-8
 
 import csv
+import tempfile
+import uuid
 
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db import transaction
+from django.utils.text import slugify
 
-from core.models import Praca
+from pracas.derived import rebuild_derived_data
+from pracas.models import Praca
+
+
+REQUIRED_FIELDS = ('contrato', 'regiao', 'uf', 'municipio', 'modelo',
+                   'situacao')
+
+LOADABLE_FIELDS = REQUIRED_FIELDS + (
+    'nome', 'logradouro', 'cep', 'bairro', 'data_inauguracao', 'lat', 'long',
+    'repasse', 'telefone1', 'telefone2', 'fax', 'email1', 'email2', 'pagina',
+)
+
+STAGING_TABLE = 'praca_staging'
+
+# Coluna da tabela temporária com o nome gerado para as Praças sem nome,
+# utilizado apenas na inclusão
+GENERATED_NAME = 'nome_gerado'
 
 
 class Command(BaseCommand):
     help = 'Carrega a lista de praças a partir de um arquivo CSV pré-determinado'
 
-
     def add_arguments(self, parser):
         parser.add_argument('file', type=str)
+        parser.add_argument('--delimiter', type=str, default=',')
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Apaga os valores existentes quando a célula estiver vazia')
+
+    def clean_row(self, row, fields):
+        """
+        Converte e valida os valores da linha com as regras dos campos da
+        Praça (tipos, tamanhos e choices).
+        """
+        values = {}
+        for name, field in fields.items():
+            value = (row.get(name) or '').strip()
+            if name == 'uf':
+                value = value.lower()
+            if not value and (field.null or name == 'nome'):
+                values[name] = None
+                continue
+            values[name] = field.clean(value, None)
+        return values
 
     def handle(self, *args, **kwargs):
-        print(args)
+        opts = Praca._meta
+
+        with open(kwargs['file'], newline='', encoding='utf-8') as arquivo:
+            reader = csv.DictReader(arquivo, delimiter=kwargs['delimiter'])
+            header = [name for name in LOADABLE_FIELDS
+                      if name in (reader.fieldnames or ())]
+            missing = set(REQUIRED_FIELDS) - set(header)
+            if missing:
+                raise CommandError('Colunas obrigatórias ausentes: {}'.format(
+                    ', '.join(sorted(missing))))
+
+            fields = {name: opts.get_field(name) for name in header}
+            columns = ['id_pub', 'slug', GENERATED_NAME] + header
+            if 'nome' not in columns:
+                columns.append('nome')
+
+            rejected = []
+            contratos = set()
+            staged = tempfile.SpooledTemporaryFile(mode='w+', newline='')
+            writer = csv.writer(staged)
+
+            # Linha 1 é o cabeçalho
+            for line, row in enumerate(reader, start=2):
+                try:
+                    values = self.clean_row(row, fields)
+                except ValidationError as error:
+                    rejected.append((line, '; '.join(error.messages)))
+                    continue
+
+                if values['contrato'] in contratos:
+                    rejected.append((line, 'Contrato repetido no arquivo'))
+                    continue
+                contratos.add(values['contrato'])
+
+                values.setdefault('nome', None)
+                values[GENERATED_NAME] = 'Praça CEU de {} - {}'.format(
+                    values['municipio'], values['uf'].upper())
+                values['slug'] = slugify(
+                    values['nome'] or values[GENERATED_NAME])
+                values['id_pub'] = uuid.uuid4()
+
+                writer.writerow(values[name] for name in columns)
+
+        staged.seek(0)
+        with transaction.atomic():
+            inserted, updated = self.upsert(staged, columns, header,
+                                            kwargs['overwrite'])
+            pracas = list(Praca.objects.filter(
+                contrato__in=contratos).values_list('pk', flat=True))
+            rebuild_derived_data(pracas)
+
+        self.stdout.write(self.style.SUCCESS(
+            '{} praças incluídas, {} atualizadas'.format(inserted, updated)))
+        if rejected:
+            self.stdout.write(self.style.WARNING(
+                '{} linhas rejeitadas:'.format(len(rejected))))
+            for line, reason in rejected:
+                self.stdout.write('  linha {}: {}'.format(line, reason))
+
+    def upsert(self, staged, columns, header, overwrite=False):
+        """
+        Copia as linhas válidas para uma tabela temporária com COPY e
+        atualiza ou inclui as Praças a partir do número de contrato. Sem
+        `overwrite`, as células vazias mantêm os valores existentes.
+        """
+        qn = connection.ops.quote_name
+        table = qn(Praca._meta.db_table)
+        staging = qn(STAGING_TABLE)
+        names = ', '.join(qn(name) for name in columns)
+        praca_columns = [name for name in columns if name != GENERATED_NAME]
+
+        # A tabela temporária tem apenas as colunas carregadas, sem as
+        # restrições NOT NULL da tabela de Praças
+        select = ', '.join(
+            'nome AS {}'.format(qn(name)) if name == GENERATED_NAME
+            else qn(name) for name in columns)
+
+        # Colunas atualizadas: as presentes no arquivo e a versão da Praça. O
+        # nome é mantido quando não informado e o slug só é recalculado
+        # quando o nome muda
+        update = [
+            '{0} = s.{0}'.format(qn(name))
+            if overwrite or not Praca._meta.get_field(name).null
+            else '{0} = COALESCE(s.{0}, p.{0})'.format(qn(name))
+            for name in header if name not in ('contrato', 'nome')]
+        update += [
+            'nome = COALESCE(s.nome, p.nome)',
+            'slug = CASE WHEN s.nome IS NULL OR s.nome = p.nome THEN p.slug '
+            'ELSE s.slug END',
+            'updated_at = now()',
+        ]
+        insert = ['COALESCE(s.nome, s.{})'.format(qn(GENERATED_NAME))
+                  if name == 'nome' else 's.{}'.format(qn(name))
+                  for name in praca_columns]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE {} ON COMMIT DROP AS '
+                'SELECT {} FROM {} WITH NO DATA'.format(
+                    staging, select, table))
+            cursor.copy_expert(
+                'COPY {} ({}) FROM STDIN WITH CSV'.format(staging, names),
+                staged)
+
+            cursor.execute(
+                'UPDATE {table} AS p SET {columns} FROM {staging} AS s '
+                'WHERE p.contrato = s.contrato'.format(
+                    table=table, staging=staging, columns=', '.join(update)))
+            updated = cursor.rowcount
+
+            cursor.execute(
+                "INSERT INTO {table} ({names}, header_img, updated_at) "
+                "SELECT {values}, '', now() FROM {staging} AS s "
+                "WHERE NOT EXISTS (SELECT 1 FROM {table} AS p "
+                "WHERE p.contrato = s.contrato)".format(
+                    table=table, staging=staging,
+                    names=', '.join(qn(name) for name in praca_columns),
+                    values=', '.join(insert)))
+            inserted = cursor.rowcount
+
+        return inserted, updated
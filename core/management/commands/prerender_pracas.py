@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+
+from core.cache import is_shared_cache
+from pracas.models import Praca
+from pracas.prerender import render_pracas
+
+
+def _render_chunk(pracas):
+    try:
+        return render_pracas(pracas)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Pré-renderiza o detalhe de todas as Praças no cache (requer um '
+            'cache compartilhado, ex.: FileBasedCache)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.PRERENDER_WORKERS)
+        parser.add_argument('--chunk-size', type=int, default=50)
+
+    def handle(self, *args, **kwargs):
+        if not settings.API_BASE_URL:
+            raise CommandError('Defina API_BASE_URL para pré-renderizar')
+        if not is_shared_cache():
+            raise CommandError(
+                'O cache configurado não é compartilhado com o servidor: '
+                'defina CACHE_BACKEND (ex.: FileBasedCache)')
+
+        pracas = list(Praca.objects.values_list('pk', flat=True))
+        size = kwargs['chunk_size']
+        chunks = [pracas[i:i + size] for i in range(0, len(pracas), size)]
+
+        if kwargs['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=kwargs['workers']) as pool:
+                total = sum(pool.map(_render_chunk, chunks))
+        else:
+            total = sum(render_pracas(chunk) for chunk in chunks)
+
+        self.stdout.write(
+            self.style.SUCCESS('{} Praças pré-renderizadas'.format(total)))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from pracas.catchment import CATCHMENT_MODELS
+from pracas.catchment import refresh_catchment
+
+
+class Command(BaseCommand):
+    help = ('Recalcula a distância de todos os atores e parceiros até a sua '
+            'Praça e até a Praça mais próxima')
+
+    def handle(self, *args, **kwargs):
+        for name, model in CATCHMENT_MODELS:
+            total = refresh_catchment(model)
+            self.stdout.write(
+                self.style.SUCCESS('{} {} atualizados'.format(total, name)))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from pracas.models import ResumoPraca
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo utilizado na listagem de Praças'
+
+    def handle(self, *args, **kwargs):
+        total = ResumoPraca.objects.refresh()
+        self.stdout.write(
+            self.style.SUCCESS('{} Praças no resumo'.format(total)))
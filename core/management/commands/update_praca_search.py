@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from pracas.models import Praca
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o vetor de busca textual de todas as Praças'
+
+    def handle(self, *args, **kwargs):
+        total = Praca.objects.all().update_search_vector()
+        self.stdout.write(
+            self.style.SUCCESS('{} Praças atualizadas'.format(total)))
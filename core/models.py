@@ -1,7 +1,10 @@
 import uuid
 
 from django.conf import settings
+from django.db import connections
 from django.db import models
+from django.db.models.signals import pre_migrate
+from django.dispatch import receiver
 from django.utils.text import slugify
 from django.utils.translation import ugettext as _
 from rest_framework.reverse import reverse
@@ -9,6 +12,10 @@ from rest_localflavor.br.br_states import STATE_CHOICES
 
 from .choices import REGIOES_CHOICES
 
+# Configuração de busca textual do Postgres: dicionário em português aplicado
+# após a remoção de acentos, de forma que "Goiania" encontre "Goiânia".
+TEXT_SEARCH_CONFIG = 'portuguese_unaccent'
+
 
 class IdPubIdentifier(models.Model):
     id_pub = models.UUIDField(
@@ -49,3 +56,28 @@ def upload_grupogestor_to(instance, filename):
     id_pub = instance.praca.id_pub
     basename = instance._meta.object_name.lower()
     return f'{id_pub}/docs/{basename}/{new_name}.{ext}'
+
+
+@receiver(pre_migrate)
+def create_text_search_config(sender, using='default', **kwargs):
+    """
+    Cria as extensões `unaccent` e `pg_trgm` e a configuração de busca
+    textual utilizada pelos índices de busca, antes da criação das tabelas.
+    """
+    connection = connections[using]
+    if sender.name != 'core' or connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s',
+                       [TEXT_SEARCH_CONFIG])
+        if cursor.fetchone() is None:
+            cursor.execute(
+                'CREATE TEXT SEARCH CONFIGURATION {} (COPY = portuguese)'
+                .format(TEXT_SEARCH_CONFIG))
+            cursor.execute(
+                'ALTER TEXT SEARCH CONFIGURATION {} ALTER MAPPING FOR '
+                'hword, hword_part, word WITH unaccent, portuguese_stem'
+                .format(TEXT_SEARCH_CONFIG))
@@ -0,0 +1,241 @@
+import json
+
+from base64 import b64decode
+from base64 import b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import FieldError
+from django.core.exceptions import ValidationError
+from django.db.models import Model
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) que segue a ordenação definida no
+    `Meta.ordering` de cada model, acrescida da chave primária para que o
+    cursor seja estável mesmo quando existem valores repetidos.
+
+    O cursor guarda os valores de todas as colunas de ordenação do último
+    registro da página, de forma que a próxima página é obtida com um filtro
+    `WHERE (a, b, pk) > (x, y, z)` em vez de um `OFFSET`, mantendo o custo
+    constante independente da página solicitada.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_ordering(self, queryset):
+        """
+        Retorna a ordenação do queryset com a chave primária como desempate
+        """
+        ordering = list(queryset.query.order_by or
+                        queryset.model._meta.ordering)
+        pk_name = queryset.model._meta.pk.name
+        if not {'pk', '-pk', pk_name, '-' + pk_name}.intersection(ordering):
+            ordering.append('pk')
+        return ordering
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.nullable = [self._is_nullable(queryset.model, field)
+                         for field in self.ordering]
+        self.fields = [self._output_field(queryset, field)
+                       for field in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (not isinstance(position, list) or
+                len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Os valores são convertidos pelo campo de cada coluna, de forma que
+        # um cursor adulterado não chegue ao banco
+        try:
+            position = [
+                value if value is None or field is None
+                else field.to_python(value)
+                for field, value in zip(self.fields, position)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        encoded = b64encode(cursor.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def get_schema_fields(self, view):
+        return []
+
+    def _position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr, None)
+            if isinstance(value, Model):
+                value = value.pk
+            position.append(None if value is None else str(value))
+        return position
+
+    def _after(self, position, reverse):
+        """
+        Monta o filtro lexicográfico equivalente a `(a, b, pk) > (x, y, z)`
+        respeitando a direção de cada coluna e a posição dos NULLs (o
+        Postgres os coloca ao final em ordenação ascendente).
+        """
+        conditions = []
+        equal = Q()
+        for field, nullable, value in zip(self.ordering, self.nullable,
+                                          position):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+
+            if value is None:
+                same = Q(**{name + '__isnull': True})
+                if descending:
+                    conditions.append(equal & Q(**{name + '__isnull': False}))
+            else:
+                lookup = '__lt' if descending else '__gt'
+                greater = Q(**{name + lookup: value})
+                if nullable and not descending:
+                    greater |= Q(**{name + '__isnull': True})
+                same = Q(**{name: value})
+                conditions.append(equal & greater)
+
+            equal &= same
+
+        condition = conditions.pop(0)
+        for other in conditions:
+            condition |= other
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _output_field(queryset, field):
+        """
+        Retorna o campo que converte o valor da coluna de ordenação guardado
+        no cursor, ou None quando ele não puder ser determinado.
+        """
+        name = field.lstrip('-')
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            try:
+                return annotation.output_field
+            except FieldError:
+                return None
+
+        opts = queryset.model._meta
+        model_field = None
+        for attr in name.split('__'):
+            try:
+                model_field = (opts.pk if attr == 'pk'
+                               else opts.get_field(attr))
+            except FieldDoesNotExist:
+                return None
+            if model_field.related_model is not None:
+                opts = model_field.related_model._meta
+
+        if not hasattr(model_field, 'to_python'):
+            return None
+        return model_field
+
+    @staticmethod
+    def _is_nullable(model, field):
+        opts = model._meta
+        for attr in field.lstrip('-').split('__'):
+            if attr == 'pk':
+                return False
+            try:
+                model_field = opts.get_field(attr)
+            except FieldDoesNotExist:
+                return True
+            if model_field.null:
+                return True
+            if model_field.related_model is not None:
+                opts = model_field.related_model._meta
+        return False
@@ -0,0 +1,121 @@
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework import serializers
+
+
+DISPLAY_METHOD = re.compile(r'^get_(?P<field>\w+)_display$')
+
+
+def parse_expand(value):
+    """
+    Converte o parâmetro `expand` (ex.: 'gestor,grupo_gestor.membros') em uma
+    árvore de dicionários com os campos a serem expandidos em cada nível.
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes an additional `fields` argument that
+    controls which fields should be displayed.
+    """
+
+    # Colunas do model necessárias para campos que não apontam diretamente
+    # para uma coluna (ex.: SerializerMethodField). Uma tupla vazia indica
+    # que apenas a chave primária é necessária.
+    field_columns = {}
+
+    # Campos aninhados que, quando não expandidos, são representados apenas
+    # pela chave primária do objeto relacionado.
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        # Don't pass the 'fields' arg up to the superclass
+        fields = kwargs.pop('fields', None)
+
+        # Árvore de campos a expandir; None expande todos os campos
+        self.expand = kwargs.pop('expand', None)
+
+        # Instantiate the superclass normally
+        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
+
+        if fields is not None:
+            # Drop any fields that are not specified in the `fields` argument.
+            allowed = set(fields)
+            existing = set(self.fields.keys())
+            for field_name in existing - allowed:
+                self.fields.pop(field_name)
+
+    def is_expanded(self, field_name):
+        return self.expand is None or field_name in self.expand
+
+    def get_expand(self, field_name):
+        """
+        Retorna a árvore de expansão a ser repassada ao campo aninhado
+        """
+        if self.expand is None:
+            return None
+        return self.expand.get(field_name, {})
+
+    def get_fields(self):
+        fields = super(DynamicFieldsModelSerializer, self).get_fields()
+
+        for name in self.expandable_fields:
+            field = fields.get(name)
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+
+            many = isinstance(field, serializers.ListSerializer)
+            if self.is_expanded(name):
+                child = field.child if many else field
+                if isinstance(child, DynamicFieldsModelSerializer):
+                    child.expand = self.get_expand(name)
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=field.source, many=many, read_only=True)
+
+        return fields
+
+    def get_required_columns(self):
+        """
+        Retorna o conjunto de colunas do model necessárias para os campos
+        exibidos, ou None quando algum campo não puder ser resolvido.
+        """
+        opts = self.Meta.model._meta
+        columns = {opts.pk.name}
+
+        for name, field in self.fields.items():
+            if name in self.field_columns:
+                columns.update(self.field_columns[name])
+                continue
+
+            if field.source == '*':
+                return None
+
+            attr = field.source_attrs[0]
+            display = DISPLAY_METHOD.match(attr)
+            if display:
+                attr = display.group('field')
+
+            if attr == 'get_absolute_url':
+                columns.update(f.name for f in opts.concrete_fields
+                               if f.is_relation)
+                continue
+
+            try:
+                model_field = opts.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+
+            if model_field.concrete:
+                columns.add(model_field.name)
+
+        return columns
@@ -1,12 +1,126 @@
-from rest_framework import filters
+import hashlib
+import logging
+
+from calendar import timegm
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from django_filters.rest_framework import DjangoFilterBackend
 # from django_filters.rest_framework import filters
 
+from .cache import current_generations
+from .filters import FullTextSearchFilter
+from .filters import ProximityFilter
+from .serializers import DynamicFieldsModelSerializer
+from .serializers import parse_expand
+
+logger = logging.getLogger(__name__)
+
 
 class DefaultMixin(object):
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter,
+                       ProximityFilter)
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_requested_fields(self):
+        """
+        Retorna os campos solicitados através do parâmetro `?fields=` em
+        requisições de leitura.
+        """
+        if self.request.method not in SAFE_METHODS:
+            return None
+
+        fields = self.request.query_params.get(self.fields_query_param)
+        if not fields:
+            return None
+
+        return tuple(field.strip() for field in fields.split(',')
+                     if field.strip())
+
+    def get_requested_expand(self):
+        """
+        Retorna a árvore de campos aninhados a expandir (`?expand=`). Sem o
+        parâmetro, listagens trazem apenas as referências e as demais ações
+        mantêm todos os objetos aninhados.
+        """
+        expand = self.request.query_params.get(self.expand_query_param)
+        if expand is not None:
+            return parse_expand(expand)
+
+        return {} if getattr(self, 'action', None) == 'list' else None
+
+    def get_serializer_kwargs(self, serializer_class):
+        kwargs = {}
+        if issubclass(serializer_class, DynamicFieldsModelSerializer):
+            kwargs['expand'] = self.get_requested_expand()
+            fields = self.get_requested_fields()
+            if fields:
+                kwargs['fields'] = fields
+        return kwargs
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_serializer_kwargs(
+                self.get_serializer_class()).items():
+            kwargs.setdefault(key, value)
+        return super(DefaultMixin, self).get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super(DefaultMixin, self).filter_queryset(queryset)
+        return self.narrow_queryset(queryset, self.get_serializer_class())
+
+    def narrow_queryset(self, queryset, serializer_class):
+        """
+        Restringe as colunas carregadas do banco (`.only()`) às necessárias
+        para os campos solicitados em `?fields=`.
+        """
+        fields = self.get_requested_fields()
+        if not fields or not issubclass(serializer_class,
+                                        DynamicFieldsModelSerializer):
+            return queryset
+
+        serializer = serializer_class(fields=fields,
+                                      expand=self.get_requested_expand())
+        columns = serializer.get_required_columns()
+        select_related = queryset.query.select_related
+        if columns is None or select_related is True:
+            return queryset
+
+        opts = queryset.model._meta
+        for name in select_related or ():
+            if opts.get_field(name).concrete:
+                columns.add(name)
+        for field in opts.ordering:
+            if isinstance(field, str):
+                columns.add(field.lstrip('-').split('__')[0])
+
+        return queryset.only(*columns)
+
+    def list_response(self, queryset, serializer_class):
+        """
+        Serializa uma listagem aplicando a paginação configurada na view,
+        para uso nos metodos `list` sobrescritos das rotas aninhadas.
+        """
+        kwargs = self.get_serializer_kwargs(serializer_class)
+        queryset = self.narrow_queryset(queryset, serializer_class)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, **kwargs)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = serializer_class(queryset, many=True, **kwargs)
+        return Response(serializer.data)
 
 
 class MultiSerializerViewSet(ModelViewSet):
@@ -16,3 +130,208 @@ class MultiSerializerViewSet(ModelViewSet):
                                         self.serializers[self.action])
         else:
             return self.serializer_class
+
+
+class QueryCounter(object):
+    """
+    Conta as consultas executadas na conexão durante o bloco, ativando o
+    registro de consultas do cursor de depuração apenas enquanto ele durar.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.count = 0
+
+    def __enter__(self):
+        self.force_debug_cursor = self.connection.force_debug_cursor
+        self.connection.force_debug_cursor = True
+        self.start = len(self.connection.queries_log)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.force_debug_cursor = self.force_debug_cursor
+        self.count = len(self.connection.queries_log) - self.start
+
+
+class QueryBudgetMixin(object):
+    """
+    Define um limite de consultas ao banco por ação da view (`query_budget`).
+    Com `QUERY_BUDGET_CHECK` ativo, o total de consultas de cada requisição é
+    informado no cabeçalho `X-Query-Count` e excessos são registrados no log.
+    """
+    query_budget = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, 'QUERY_BUDGET_CHECK', False):
+            return super(QueryBudgetMixin, self).dispatch(
+                request, *args, **kwargs)
+
+        with QueryCounter(connection) as queries:
+            response = super(QueryBudgetMixin, self).dispatch(
+                request, *args, **kwargs)
+
+        action = getattr(self, 'action', None)
+        budget = self.query_budget.get(action)
+        response['X-Query-Count'] = queries.count
+        if budget is not None and queries.count > budget:
+            logger.warning(
+                '%s.%s executou %d consultas (limite: %d)',
+                self.__class__.__name__, action, queries.count, budget)
+
+        return response
+
+
+class EarlyResponse(Exception):
+    """
+    Interrompe a requisição devolvendo uma resposta já pronta (ex.: 304 ou
+    resposta armazenada em cache)
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+
+class EarlyResponseMixin(object):
+
+    def handle_exception(self, exc):
+        if isinstance(exc, EarlyResponse):
+            return exc.response
+        return super(EarlyResponseMixin, self).handle_exception(exc)
+
+
+class ConditionalGetMixin(EarlyResponseMixin):
+    """
+    Responde requisições condicionais (`If-None-Match`/`If-Modified-Since`)
+    antes de carregar e serializar os objetos, a partir da versão do recurso
+    informada por `get_version()`.
+    """
+
+    def get_version(self):
+        """
+        Retorna a data da última alteração do recurso e um identificador
+        complementar (ex.: total de registros), ou None quando a requisição
+        não puder ser respondida de forma condicional.
+        """
+        return None
+
+    def get_etag(self, last_modified, extra):
+        key = '{}:{}:{}:{}'.format(
+            last_modified.isoformat(), extra, self.request.get_full_path(),
+            self.request.accepted_media_type)
+        return quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def initial(self, request, *args, **kwargs):
+        super(ConditionalGetMixin, self).initial(request, *args, **kwargs)
+
+        self.etag = self.last_modified = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+
+        version = self.get_version()
+        if version is None or version[0] is None:
+            return
+
+        last_modified, extra = version
+        self.etag = self.get_etag(last_modified, extra)
+        self.last_modified = timegm(last_modified.utctimetuple())
+
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            raise EarlyResponse(response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ConditionalGetMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            # Respostas em outra codificação já trazem o seu próprio ETag
+            if not response.has_header('ETag'):
+                response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+        return response
+
+
+class ResponseCacheMixin(EarlyResponseMixin):
+    """
+    Armazena em cache as respostas das requisições GET às ações listadas em
+    `cache_actions`, por caminho, parâmetros e perfil do usuário. As
+    respostas são invalidadas quando uma das gerações retornadas por
+    `get_cache_generations()` é alterada (ver `core.cache`).
+
+    Deve ser declarado após o ConditionalGetMixin na herança, de forma que
+    uma resposta em cache dispense também a consulta da versão do recurso.
+    """
+    cache_alias = 'default'
+    cache_actions = ('list', 'retrieve')
+
+    def get_cache_generations(self):
+        """
+        Retorna os nomes das gerações que invalidam a resposta, ou None para
+        não armazenar a resposta em cache.
+        """
+        return []
+
+    def get_cache_role(self):
+        user = self.request.user
+        if not user or not user.is_authenticated:
+            return 'publico'
+        elif user.is_staff:
+            return 'staff'
+
+        # O gestor pode ter acesso a dados da sua Praça
+        praca = user.is_praca_manager()
+        if praca:
+            return 'gestor:{}'.format(praca)
+        return 'autenticado'
+
+    def get_cache_key(self, generations):
+        generations = current_generations(generations, alias=self.cache_alias)
+        path = hashlib.md5(
+            self.request.get_full_path().encode('utf-8')).hexdigest()
+        return 'resposta:{}:{}:{}:{}'.format(
+            self.get_cache_role(), self.request.accepted_media_type, path,
+            ':'.join(generations))
+
+    def initial(self, request, *args, **kwargs):
+        super(ResponseCacheMixin, self).initial(request, *args, **kwargs)
+
+        self.cache_key = None
+        if (request.method not in ('GET', 'HEAD') or
+                getattr(self, 'action', None) not in self.cache_actions):
+            return
+
+        generations = self.get_cache_generations()
+        if generations is None:
+            return
+
+        self.cache_key = self.get_cache_key(generations)
+        cached = caches[self.cache_alias].get(self.cache_key)
+        if cached is None:
+            return
+
+        content, content_type, etag, last_modified = cached
+        response = HttpResponse(content, content_type=content_type)
+        if etag:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+
+        raise EarlyResponse(get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+            response=response))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ResponseCacheMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+
+        if (getattr(self, 'cache_key', None) and
+                isinstance(response, Response) and
+                response.status_code == 200):
+            response.render()
+            caches[self.cache_alias].set(
+                self.cache_key,
+                (response.content, response['Content-Type'],
+                 getattr(self, 'etag', None),
+                 getattr(self, 'last_modified', None)),
+                settings.RESPONSE_CACHE_TIMEOUT)
+        return response
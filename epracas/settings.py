@@ -14,6 +14,8 @@ import os
 
 import dj_database_url
 
+from django.core.exceptions import ImproperlyConfigured
+
 import raven
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -47,6 +49,7 @@ DJANGO_APPS = (
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Useful template tags:
     # 'django.contrib.humanize',
@@ -143,6 +146,11 @@ REST_FRAMEWORK = {
     #     'rest_framework.parsers.FormParser',
     #     'rest_framework.parsers.MultiPartParser',
     # },
+
+    # Paginação por cursor seguindo a ordenação de cada model
+    # http://www.django-rest-framework.org/api-guide/pagination
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', 50)),
 }
 
 
@@ -229,6 +237,50 @@ RAVEN_CONFIG = {
 
 EVENTTOOLS_REPEAT_CHOICES = None
 
+# Verifica o limite de consultas ao banco definido em cada view
+QUERY_BUDGET_CHECK = os.getenv('QUERY_BUDGET_CHECK', 'False') == 'True'
+
+# Cache das respostas da API. As respostas são invalidadas por gerações
+# gravadas no próprio cache (ver core.cache), o que exige um cache
+# compartilhado entre os processos, por exemplo:
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# CACHE_LOCATION=/var/tmp/epracas_cache
+# O cache em memória local só é aceito com um único processo
+# (CACHE_SINGLE_PROCESS=True), como nos testes e no servidor de
+# desenvolvimento.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'epracas'),
+    }
+}
+
+CACHE_SINGLE_PROCESS = os.getenv(
+    'CACHE_SINGLE_PROCESS', str(bool(os.getenv('TEST_ENV')))) == 'True'
+
+if (CACHES['default']['BACKEND'].endswith('.LocMemCache') and
+        not CACHE_SINGLE_PROCESS):
+    raise ImproperlyConfigured(
+        'O cache em memória local não é compartilhado entre os processos: '
+        'defina CACHE_BACKEND com um cache compartilhado ou '
+        'CACHE_SINGLE_PROCESS=True')
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60 * 60))
+
+# Detalhe das Praças pré-renderizado em JSON (e gzip). As URLs absolutas dos
+# arquivos são montadas a partir de API_BASE_URL (ex.: https://api.exemplo);
+# sem ela a pré-renderização fica desativada.
+API_BASE_URL = os.getenv('API_BASE_URL')
+PRERENDER_WORKERS = int(os.getenv('PRERENDER_WORKERS', 2))
+PRERENDER_TIMEOUT = int(os.getenv('PRERENDER_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Consulta GET das Praças mais próximas: a origem é aproximada para o centro
+# de uma célula da grade (tamanho em graus) e o resultado de cada célula fica
+# em cache, podendo ser reaproveitado por proxies durante DISTANCIA_MAX_AGE.
+DISTANCIA_GRID = float(os.getenv('DISTANCIA_GRID', 0.01))
+DISTANCIA_MAX_AGE = int(os.getenv('DISTANCIA_MAX_AGE', 60 * 60))
+
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND','django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', '')
 EMAIL_PORT = os.getenv('EMAIL_PORT', 25)
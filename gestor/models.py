@@ -4,6 +4,7 @@ from django.conf import settings
 from django.db import models
 from django.db.models.signals import pre_save
 from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext as _
@@ -14,7 +15,11 @@ from rest_framework.serializers import ValidationError
 from core.models import IdPubIdentifier
 from core.models import upload_doc_to
 
+from authentication.models import User
+
 from pracas.models import Praca
+from pracas.models import ResumoPraca
+from pracas.models import praca_being_deleted
 
 from core.choices import REGIOES_CHOICES
 
@@ -141,3 +146,59 @@ def create_praca_manager(sender, instance, **kwargs):
     if instance.aprovado:
         gestor = Gestor(praca=instance.praca, user=instance.user, atual=True)
         gestor.save()
+
+
+@receiver(post_save, sender=Gestor)
+@receiver(post_delete, sender=Gestor)
+def refresh_praca_summary_from_manager(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza o resumo e a versão da Praça quando o seu gestor for alterado,
+    exceto quando o gestor for excluido junto com a Praça.
+    """
+    if (instance.praca_id and not raw and
+            not praca_being_deleted(instance.praca_id)):
+        ResumoPraca.objects.refresh([instance.praca_id])
+        Praca.objects.filter(pk=instance.praca_id).touch()
+
+
+# Dados do usuário exibidos no resumo das Praças que ele gere
+USER_SUMMARY_FIELDS = ('full_name', 'email', 'profile_picture_url', 'id_pub')
+
+
+def _skips_summary(update_fields):
+    return (update_fields is not None and
+            not set(update_fields) & set(USER_SUMMARY_FIELDS))
+
+
+@receiver(pre_save, sender=User)
+def remember_user_summary(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """
+    Guarda os dados do usuário exibidos no resumo das Praças como estavam
+    gravados antes da alteração
+    """
+    if not raw and not _skips_summary(update_fields):
+        instance._resumo_gravado = sender.objects.filter(
+            pk=instance.pk).values_list(*USER_SUMMARY_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def refresh_praca_summary_from_user(sender, instance, created=False,
+                                    raw=False, update_fields=None, **kwargs):
+    """
+    Atualiza o resumo e a versão das Praças geridas pelo usuário quando os
+    dados exibidos no resumo forem alterados. Gravações de outros campos,
+    como o `last_login` a cada autenticação, são ignoradas.
+    """
+    if raw or created or _skips_summary(update_fields):
+        return
+
+    atuais = tuple(getattr(instance, field) for field in USER_SUMMARY_FIELDS)
+    if getattr(instance, '_resumo_gravado', None) == atuais:
+        return
+
+    pracas = list(Gestor.objects.filter(
+        user=instance, atual=True).values_list('praca', flat=True))
+    if pracas:
+        ResumoPraca.objects.refresh(pracas)
+        Praca.objects.filter(pk__in=pracas).touch()
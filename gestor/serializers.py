@@ -2,13 +2,15 @@ from rest_framework import serializers
 
 from authentication.serializers import UserSerializer
 
+from core.serializers import DynamicFieldsModelSerializer
+
 from .models import Gestor
 from .models import ProcessoVinculacao
 from .models import ArquivosProcessoVinculacao
 from .models import RegistroProcessoVinculacao
 
 
-class GestorBaseSerializer(serializers.ModelSerializer):
+class GestorBaseSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     nome = serializers.CharField(source='user.full_name', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -17,7 +19,13 @@ class GestorBaseSerializer(serializers.ModelSerializer):
         source='user.profile_picture_url', read_only=True)
     praca = serializers.SerializerMethodField(read_only=True)
 
+    field_columns = {'praca': ('praca',)}
+    expandable_fields = ('praca',)
+
     def get_praca(self, obj):
+        if not self.is_expanded('praca'):
+            return obj.praca_id
+
         from pracas.serializers import PracaListSerializer
         serializer = PracaListSerializer(
             obj.praca,
@@ -40,7 +48,7 @@ class GestorListSerializer(GestorBaseSerializer):
                   'praca')
 
 
-class GestorSerializer(serializers.ModelSerializer):
+class GestorSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     nome = serializers.CharField(source='user.full_name', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -49,7 +57,13 @@ class GestorSerializer(serializers.ModelSerializer):
         source='user.profile_picture_url', read_only=True)
     praca = serializers.SerializerMethodField(read_only=True)
 
+    field_columns = {'praca': ('praca',)}
+    expandable_fields = ('praca',)
+
     def get_praca(self, obj):
+        if not self.is_expanded('praca'):
+            return obj.praca_id
+
         from pracas.serializers import PracaListSerializer
         serializer = PracaListSerializer(
             obj.praca,
@@ -77,14 +91,21 @@ class RegistroProcessoVinculacaoSerializer(serializers.ModelSerializer):
         fields = ('data', 'situacao', 'descricao')
 
 
-class ProcessoVinculacaoListSerializer(serializers.ModelSerializer):
+class ProcessoVinculacaoListSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     praca = serializers.SerializerMethodField(read_only=True)
     user = UserSerializer(read_only=True)
 
+    field_columns = {'praca': ('praca',)}
+    expandable_fields = ('praca',)
+
     def get_praca(self, obj):
+        if not self.is_expanded('praca'):
+            return obj.praca_id
+
         from pracas.serializers import PracaListSerializer
-        serializer = PracaListSerializer(obj.praca)
+        serializer = PracaListSerializer(
+            obj.praca, expand=self.get_expand('praca'))
         return serializer.data
 
     class Meta:
@@ -93,16 +114,23 @@ class ProcessoVinculacaoListSerializer(serializers.ModelSerializer):
                   'data_finalizacao', 'finalizado')
 
 
-class ProcessoVinculacaoDetailSerializer(serializers.ModelSerializer):
+class ProcessoVinculacaoDetailSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     praca = serializers.SerializerMethodField(read_only=True)
     user = UserSerializer(read_only=True)
     files = ArquivosProcessoVinculacaoSerializer(many=True, read_only=True)
     registro = RegistroProcessoVinculacaoSerializer(many=True, read_only=True)
 
+    field_columns = {'praca': ('praca',)}
+    expandable_fields = ('praca',)
+
     def get_praca(self, obj):
+        if not self.is_expanded('praca'):
+            return obj.praca_id
+
         from pracas.serializers import PracaListSerializer
-        serializer = PracaListSerializer(obj.praca)
+        serializer = PracaListSerializer(
+            obj.praca, expand=self.get_expand('praca'))
         return serializer.data
 
     class Meta:
@@ -112,7 +140,7 @@ class ProcessoVinculacaoDetailSerializer(serializers.ModelSerializer):
                   'despacho', 'registro')
 
 
-class ProcessoVinculacaoSerializer(serializers.ModelSerializer):
+class ProcessoVinculacaoSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     user = UserSerializer(
         read_only=True, default=serializers.CurrentUserDefault())
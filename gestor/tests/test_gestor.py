@@ -119,12 +119,12 @@ def test_return_all_managers_from_a_praca(client):
     response = client.get(_list() + '?praca={}'.format(pracas[0].pk))
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 4
+    assert len(response.data['results']) == 4
 
     response = client.get(_list() + '?praca={}'.format(pracas[1].pk))
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 2
+    assert len(response.data['results']) == 2
 
 
 @pytest.mark.skip
@@ -283,4 +283,4 @@ def test_list_only_managers_with_mandate(client):
     response = client.get(_list() + '?atual=true')
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
+    assert len(response.data['results']) == 1
@@ -196,7 +196,7 @@ def test_return_a_list_of_process(client):
         reverse('gestor:processovinculacao-list'), format='json')
 
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response.data, list)
+    assert isinstance(response.data['results'], list)
 
 
 def test_return_a_list_of_open_processes(client):
@@ -218,7 +218,7 @@ def test_return_a_list_of_open_processes(client):
     response = client.get(f'{_list()}?finalizado=false')
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 5
+    assert len(response.data['results']) == 5
 
 
 def test_return_changes_on_status_processes(_admin_user, client):
@@ -256,10 +256,10 @@ def test_which_fields_returns_on_a_list_of_process(client):
         reverse('gestor:processovinculacao-list'), format='json')
 
     for field in fields:
-        assert field in response.data[0]
-        response.data[0].pop(field)
+        assert field in response.data['results'][0]
+        response.data['results'][0].pop(field)
 
-    assert len(response.data[0]) == 0
+    assert len(response.data['results'][0]) == 0
 
 
 def test_returning_information_about_a_praca_on_a_process(client):
@@ -273,10 +273,11 @@ def test_returning_information_about_a_praca_on_a_process(client):
 
     fields = ('url', 'id_pub', 'nome', 'municipio', 'uf')
     response = client.get(
-        reverse('gestor:processovinculacao-list'), format='json')
+        reverse('gestor:processovinculacao-list') + '?expand=praca',
+        format='json')
 
     for field in fields:
-        assert field in response.data[0]['praca']
+        assert field in response.data['results'][0]['praca']
 
 
 def test_returning_information_about_an_user_of_a_process(client):
@@ -294,8 +295,8 @@ def test_returning_information_about_an_user_of_a_process(client):
         reverse('gestor:processovinculacao-list'), format='json')
 
     for field in fields:
-        assert field in response.data[0]['user']
-        response.data[0]['user'].pop(field)
+        assert field in response.data['results'][0]['user']
+        response.data['results'][0]['user'].pop(field)
 
     # assert len(response.data[0]['praca']) == 0
 
@@ -1,5 +1,6 @@
 from datetime import date
 
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
@@ -26,6 +27,8 @@ from core.views import MultiSerializerViewSet
 
 from authentication.models import User
 
+from pracas.models import Praca
+
 from .models import Gestor
 from .models import ProcessoVinculacao
 from .models import ArquivosProcessoVinculacao
@@ -47,7 +50,7 @@ class GestorViewSet(DefaultMixin, MultiSerializerViewSet, ModelViewSet):
     authentication_classes = (JSONWebTokenAuthentication, )
     permission_classes = (IsManagerOrReadOnly, )
 
-    queryset = Gestor.objects.all()
+    queryset = Gestor.objects.select_related('user')
     serializer_class = GestorSerializer
 
     serializers = {
@@ -56,6 +59,13 @@ class GestorViewSet(DefaultMixin, MultiSerializerViewSet, ModelViewSet):
 
     filter_fields = ('praca', 'atual')
 
+    def get_queryset(self):
+        queryset = super(GestorViewSet, self).get_queryset()
+        expand = self.get_requested_expand()
+        if expand is None or 'praca' in expand:
+            queryset = queryset.select_related('praca')
+        return queryset
+
     def destroy(self, request, pk=None):
         gestor = get_object_or_404(Gestor, pk=pk)
 
@@ -80,7 +90,7 @@ class ProcessoViewSet(DefaultMixin, MultiSerializerViewSet, ModelViewSet):
     authentication_classes = (JSONWebTokenAuthentication, )
     permission_classes = (CommonUserOrReadOnly, )
 
-    queryset = ProcessoVinculacao.objects.all()
+    queryset = ProcessoVinculacao.objects.select_related('user')
     serializer_class = ProcessoVinculacaoSerializer
     serializers = {
         'list': ProcessoVinculacaoListSerializer,
@@ -89,6 +99,15 @@ class ProcessoViewSet(DefaultMixin, MultiSerializerViewSet, ModelViewSet):
 
     filter_fields = ('praca', 'aprovado', 'finalizado')
 
+    def get_queryset(self):
+        queryset = super(ProcessoViewSet, self).get_queryset()
+        expand = self.get_requested_expand()
+        if expand is None or 'praca' in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch('praca',
+                         queryset=Praca.objects.with_current_management()))
+        return queryset
+
     def partial_update(self, request, pk=None):
         processo = get_object_or_404(ProcessoVinculacao, pk=pk)
 
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import Max
+from django.db.models import Q
+from django.db.models import Sum
+from django.db.models import When
+
+from core.db import bulk_update
+from core.functions import Distance
+from core.functions import bounding_box
+from core.functions import Median
+
+from . import spatial
+from .models import Ator
+from .models import Parceiro
+from .models import Praca
+
+# Modelos com a distância até a Praça calculada, identificados no relatório
+CATCHMENT_MODELS = (
+    ('atores', Ator),
+    ('parceiros', Parceiro),
+)
+
+# Faixas de distância do relatório de abrangência, em quilômetros
+RAIOS_KM = (5, 10, 20)
+
+CATCHMENT_FIELDS = ('distancia_praca', 'praca_mais_proxima_id',
+                    'distancia_praca_mais_proxima')
+
+
+def compute_catchment(rows):
+    """
+    Calcula, para cada linha (lat, long, lat da Praça, long da Praça), a
+    distância até a Praça vinculada e a Praça mais próxima, no formato
+    [(distância, id_pub da mais próxima, distância da mais próxima)].
+    """
+    if not rows:
+        return []
+
+    coords = np.array([[np.nan if value is None else float(value)
+                        for value in row] for row in rows]).reshape(-1, 4)
+    located = ~np.isnan(coords[:, :2]).any(axis=1)
+
+    # Operação elemento a elemento: origens e destinos com o mesmo tamanho
+    distances = spatial.haversine(coords[:, 0], coords[:, 1],
+                                  coords[:, 2], coords[:, 3])
+    nearest = iter(spatial.index.nearest_many(coords[located, :2], 1))
+
+    results = []
+    for distance, is_located in zip(distances, located):
+        distance = None if np.isnan(distance) else float(distance)
+        closest = next(nearest) if is_located else []
+        if closest:
+            (pk, closest_distance), = closest
+            results.append((distance, pk, closest_distance))
+        else:
+            results.append((distance, None, None))
+    return results
+
+
+def refresh_catchment(model, queryset=None):
+    """
+    Recalcula as distâncias dos registros do queryset (ou de todos os
+    registros do modelo), gravando apenas os que tiverem sido alterados e
+    atualizando a versão das Praças afetadas. Retorna o total de registros
+    alterados.
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+
+    rows = list(queryset.values_list(
+        'pk', 'praca_id', 'lat', 'long', 'praca__lat', 'praca__long',
+        *CATCHMENT_FIELDS))
+    results = compute_catchment([row[2:6] for row in rows])
+
+    changed = [(row[0], row[1], result)
+               for row, result in zip(rows, results)
+               if tuple(row[6:]) != result]
+    if not changed:
+        return 0
+
+    bulk_update(model, CATCHMENT_FIELDS,
+                [(pk,) + result for pk, praca, result in changed])
+
+    Praca.objects.filter(pk__in={
+        praca for pk, praca, result in changed if praca}).touch()
+    return len(changed)
+
+
+def praca_moved(praca, deleted=False):
+    """
+    Recalcula as distâncias dos registros vinculados à Praça e dos que
+    podem ter passado a ter (ou deixado de ter) a Praça como mais próxima.
+    """
+    origin = None if deleted else spatial.point(praca.get_latlong())
+
+    for name, model in CATCHMENT_MODELS:
+        candidates = Q(praca_mais_proxima=None, lat__isnull=False,
+                       long__isnull=False)
+        if not deleted:
+            candidates |= Q(praca=praca.pk) | Q(praca_mais_proxima=praca.pk)
+
+        queryset = model.objects.filter(candidates)
+        # Só podem estar mais próximos da Praça os registros dentro da bbox
+        # com a maior distância atual até uma Praça mais próxima
+        limite = origin and model.objects.aggregate(
+            limite=Max('distancia_praca_mais_proxima'))['limite']
+        if limite:
+            lats, longs = bounding_box(*origin, radius=limite)
+            closer = model.objects.filter(lat__range=lats)
+            if longs:
+                closer = closer.filter(long__range=longs)
+            closer = closer.annotate(distancia=Distance(
+                'lat', 'long', *origin,
+            )).filter(distancia__lt=F('distancia_praca_mais_proxima'))
+            queryset = queryset | model.objects.filter(pk__in=closer.values(
+                'pk'))
+
+        refresh_catchment(model, queryset)
+
+
+def catchment_report(praca):
+    """
+    Retorna, para os atores e parceiros da Praça, a quantidade, a mediana e
+    a máxima distância até a Praça, a quantidade dentro de cada faixa de
+    `RAIOS_KM` e a dos que estão mais próximos de outra Praça, a partir das
+    distâncias já calculadas.
+    """
+    def count(condition):
+        return Sum(Case(When(condition, then=1), default=0,
+                        output_field=IntegerField()))
+
+    aggregates = OrderedDict([
+        ('total', Count('pk')),
+        ('georreferenciados', Count('distancia_praca')),
+        ('mediana', Median('distancia_praca')),
+        ('maxima', Max('distancia_praca')),
+    ])
+    for km in RAIOS_KM:
+        aggregates['ate_{}km'.format(km)] = count(
+            Q(distancia_praca__lte=km * 1000))
+    aggregates['mais_proximos_de_outra_praca'] = count(
+        Q(praca_mais_proxima__isnull=False) &
+        ~Q(praca_mais_proxima=praca.pk))
+
+    report = OrderedDict()
+    for name, model in CATCHMENT_MODELS:
+        values = model.objects.filter(praca=praca.pk).aggregate(**aggregates)
+        report[name] = OrderedDict(
+            (key, round(values[key]) if values[key] is not None else
+             None if key in ('mediana', 'maxima') else 0)
+            for key in aggregates)
+    return report
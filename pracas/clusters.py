@@ -0,0 +1,167 @@
+import math
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache import current_generations
+from core.cache import invalidate_cache_generations
+
+from .models import Ator
+from .models import Parceiro
+from .models import Praca
+
+# Modelos exibidos no mapa, identificados pelo tipo de ponto
+POINT_MODELS = (
+    ('praca', Praca),
+    ('ator', Ator),
+    ('parceiro', Parceiro),
+)
+
+MAX_ZOOM = 14
+
+# Células por tile em cada eixo: em um tile de 256px, células de ~64px
+CELLS_PER_TILE = 4
+
+# Máximo de células por consulta: bboxes maiores são atendidas em um nivel
+# de zoom menor
+MAX_CELLS = 4096
+
+
+def cell_size(zoom):
+    """
+    Retorna o tamanho, em graus, das células da grade no nivel de zoom
+    """
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def cell_of(lat, long, zoom):
+    size = cell_size(zoom)
+    return (int(math.floor(long / size)), int(math.floor(lat / size)))
+
+
+def cell_generation(zoom, cell):
+    return 'clusters:{}:{}:{}'.format(zoom, *cell)
+
+
+def cell_keys(zoom, cells):
+    """
+    Retorna a chave em cache do cluster de cada célula, vinculada à geração
+    de todos os clusters e à geração da própria célula.
+    """
+    generations = current_generations(
+        ['clusters'] + [cell_generation(zoom, cell) for cell in cells])
+    clusters = generations.pop(0)
+    return {cell: 'clusters:{}:{}:{}:{}:{}'.format(
+        clusters, zoom, cell[0], cell[1], generation)
+        for cell, generation in zip(cells, generations)}
+
+
+def aggregate(members):
+    """
+    Agrega os pontos de uma célula em um cluster com quantidade por tipo,
+    centroide e bbox.
+    """
+    lats = [lat for (lat, long) in members.values()]
+    longs = [long for (lat, long) in members.values()]
+
+    tipos = defaultdict(int)
+    for tipo, pk in members:
+        tipos[tipo] += 1
+
+    return {
+        'quantidade': len(members),
+        'tipos': dict(tipos),
+        'lat': sum(lats) / len(lats),
+        'long': sum(longs) / len(longs),
+        'bbox': [min(longs), min(lats), max(longs), max(lats)],
+    }
+
+
+def load_clusters(zoom, cells):
+    """
+    Monta os clusters das células informadas, no formato {célula: cluster}
+    (vazio para as células sem pontos), com uma consulta por modelo limitada
+    à bbox das células.
+    """
+    size = cell_size(zoom)
+    xs = [x for (x, y) in cells]
+    ys = [y for (x, y) in cells]
+
+    members = {cell: {} for cell in cells}
+    for tipo, model in POINT_MODELS:
+        queryset = model.objects.filter(
+            lat__range=(min(ys) * size, (max(ys) + 1) * size),
+            long__range=(min(xs) * size, (max(xs) + 1) * size),
+        ).values_list('pk', 'lat', 'long')
+        for pk, lat, long in queryset:
+            lat, long = float(lat), float(long)
+            cell = cell_of(lat, long, zoom)
+            if cell in members:
+                members[cell][(tipo, str(pk))] = (lat, long)
+
+    return {cell: aggregate(points) if points else {}
+            for cell, points in members.items()}
+
+
+def clusters_in_bbox(zoom, min_long, min_lat, max_long, max_lat):
+    """
+    Retorna os clusters do nivel de zoom que intersectam a bbox informada.
+
+    O cluster de cada célula é mantido em cache separadamente e remontado
+    apenas quando um ponto entra ou sai da célula.
+    """
+    zoom = max(0, min(zoom, MAX_ZOOM))
+    while True:
+        (min_x, min_y) = cell_of(min_lat, min_long, zoom)
+        (max_x, max_y) = cell_of(max_lat, max_long, zoom)
+        cells = (max_x - min_x + 1) * (max_y - min_y + 1)
+        if zoom == 0 or cells <= MAX_CELLS:
+            break
+        zoom -= 1
+
+    cells = [(x, y) for x in range(min_x, max_x + 1)
+             for y in range(min_y, max_y + 1)]
+    if not cells:
+        return []
+
+    # As gerações são lidas antes dos dados, para que uma alteração
+    # concorrente invalide as células montadas com dados desatualizados.
+    cache = caches['default']
+    keys = cell_keys(zoom, cells)
+    cached = cache.get_many(list(keys.values()))
+    clusters = {cell: cached[key] for cell, key in keys.items()
+                if key in cached}
+
+    missing = [cell for cell in cells if cell not in clusters]
+    if missing:
+        loaded = load_clusters(zoom, missing)
+        cache.set_many({keys[cell]: cluster
+                        for cell, cluster in loaded.items()},
+                       settings.RESPONSE_CACHE_TIMEOUT)
+        clusters.update(loaded)
+
+    return [clusters[cell] for cell in cells if clusters[cell]]
+
+
+def reset_clusters():
+    """
+    Descarta os clusters de todos os niveis de zoom em cache
+    """
+    invalidate_cache_generations('clusters')
+
+
+def point_moved(old=None, new=None):
+    """
+    Invalida, em cada nivel de zoom, apenas as células de origem e de
+    destino de um ponto incluido, movido ou removido. As posições são
+    tuplas (lat, long), ou None para um ponto fora do mapa.
+    """
+    if old == new:
+        return
+
+    invalidate_cache_generations(*{
+        cell_generation(zoom, cell_of(position[0], position[1], zoom))
+        for zoom in range(MAX_ZOOM + 1)
+        for position in (old, new) if position is not None})
@@ -0,0 +1,33 @@
+from core.cache import invalidate_cache_generations
+
+from .catchment import CATCHMENT_MODELS
+from .catchment import refresh_catchment
+from .clusters import POINT_MODELS
+from .clusters import reset_clusters
+from .models import Praca
+from .models import ResumoPraca
+from .proximity import update_geohashes
+
+
+def rebuild_derived_data(pracas=None):
+    """
+    Reconstrói os dados derivados das Praças (busca textual, geohash, resumo
+    da listagem, mapas, distâncias dos atores e parceiros e respostas em
+    cache) após cargas em lote que não disparam os signals dos models.
+    """
+    queryset = Praca.objects.all()
+    if pracas is not None:
+        queryset = queryset.filter(pk__in=pracas)
+
+    queryset.update_search_vector()
+    for tipo, model in POINT_MODELS:
+        update_geohashes(model, queryset if model is Praca else None)
+    ResumoPraca.objects.refresh(pracas)
+    queryset.touch()
+
+    invalidate_cache_generations('geojson', 'coordenadas')
+    reset_clusters()
+
+    # Qualquer Praça carregada pode ser a mais próxima de um ator ou parceiro
+    for name, model in CATCHMENT_MODELS:
+        refresh_catchment(model)
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import json
+
+from django.core.cache import caches
+
+from core.cache import current_generations
+from core.cache import invalidate_cache_generations
+
+from .models import Praca
+
+GEOJSON_PROPERTIES = ('id_pub', 'nome', 'situacao', 'modelo', 'uf')
+
+
+def geojson_key():
+    generation, = current_generations(['geojson'])
+    return 'pracas-geojson:{}'.format(generation)
+
+
+def praca_feature(values):
+    """
+    Retorna as propriedades e coordenadas exibidas no mapa para a Praça, ou
+    None quando ela não possuir coordenadas.
+    """
+    nome, situacao, modelo, uf, lat, long = values
+    if lat is None or long is None:
+        return None
+    return (nome, situacao, modelo, uf, float(lat), float(long))
+
+
+def build_geojson():
+    """
+    Monta a FeatureCollection com todas as Praças georreferenciadas,
+    armazenando no cache o conteúdo compactado, o ETag e as propriedades de
+    cada Praça utilizadas na verificação de alterações.
+    """
+    # A geração é lida antes dos dados, para que uma alteração concorrente
+    # invalide a coleção montada com dados desatualizados.
+    key = geojson_key()
+
+    features = {}
+    pracas = Praca.objects.values_list(
+        'id_pub', 'nome', 'situacao', 'modelo', 'uf', 'lat', 'long')
+    for values in pracas:
+        feature = praca_feature(values[1:])
+        if feature is not None:
+            features[str(values[0])] = feature
+
+    content = json.dumps({
+        'type': 'FeatureCollection',
+        'features': [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [long, lat]},
+            'properties': dict(zip(GEOJSON_PROPERTIES,
+                                   (pk, nome, situacao, modelo, uf))),
+        } for pk, (nome, situacao, modelo, uf, lat, long)
+            in features.items()],
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    entry = {
+        'content': gzip.compress(content),
+        'etag': hashlib.md5(content).hexdigest(),
+        'features': features,
+    }
+    caches['default'].set(key, entry, None)
+    return entry
+
+
+def get_geojson():
+    entry = caches['default'].get(geojson_key())
+    if entry is None:
+        entry = build_geojson()
+    return entry
+
+
+def praca_changed(praca, deleted=False):
+    """
+    Invalida a FeatureCollection apenas quando as coordenadas ou as
+    propriedades exibidas da Praça tiverem sido alteradas.
+    """
+    entry = caches['default'].get(geojson_key())
+    if entry is None:
+        return
+
+    feature = None
+    if not deleted:
+        feature = praca_feature((praca.nome, praca.situacao, praca.modelo,
+                                 praca.uf, praca.lat, praca.long))
+
+    if entry['features'].get(str(praca.pk)) != feature:
+        invalidate_cache_generations('geojson')
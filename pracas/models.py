@@ -1,11 +1,31 @@
+import threading
+
+from collections import OrderedDict
 from datetime import date
 
 from django.db import models
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.db.models import When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 from django.utils.text import slugify
 
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.search import SearchVectorField
 
 from rest_framework.reverse import reverse
 from rest_localflavor.br.br_states import STATE_CHOICES
@@ -14,7 +34,11 @@ from core.choices import MODELO_CHOICES
 from core.choices import REGIOES_CHOICES
 from core.choices import SITUACAO_CHOICES
 
+from core.cache import invalidate_cache_generations
+from core.geohash import encode as encode_geohash
+from core.indexes import TrigramIndex
 from core.models import IdPubIdentifier
+from core.models import TEXT_SEARCH_CONFIG
 from core.models import upload_grupogestor_to
 
 from .choices import PARCEIRO_RAMO_ATIVIDADE
@@ -31,6 +55,18 @@ from .choices import TITULARIDADE_CHOICES
 from atividades.choices import ESPACOS_CHOICES
 
 
+def invalidate_praca_responses(pracas):
+    """
+    Invalida as respostas em cache da listagem de Praças e do detalhe das
+    Praças informadas, agendando a pré-renderização do detalhe.
+    """
+    invalidate_cache_generations(
+        'pracas', *('praca:{}'.format(pk) for pk in pracas))
+
+    from .prerender import schedule_prerender
+    schedule_prerender(pracas)
+
+
 def upload_image_to(instance, filename):
     ext = filename.split('.').pop(-1)
     filename = slugify(filename.split('.').remove(ext))
@@ -43,6 +79,171 @@ def upload_image_to(instance, filename):
     return f'{praca}/images/{id_pub}.{ext}'
 
 
+class PracaQuerySet(models.QuerySet):
+
+    # Campos do detalhe da Praça e as coleções das quais dependem
+    DETAIL_PREFETCHES = {
+        'imagem': 'imagem',
+        'parceiros': 'parceiros',
+        'unidade_gestora': 'ugl',
+        'atores': 'atores',
+    }
+
+    def with_current_gestor(self):
+        """
+        Carrega em lote o gestor atual de cada Praça, com seu usuário
+        """
+        from gestor.models import Gestor
+
+        gestores = Gestor.objects.filter(
+            atual=True, data_encerramento_gestao=None).select_related('user')
+
+        return self.prefetch_related(
+            models.Prefetch('gestor', queryset=gestores,
+                            to_attr='gestores_atuais'))
+
+    def with_current_grupo_gestor(self, membros=True):
+        """
+        Carrega em lote o grupo gestor vigente de cada Praça e, se
+        solicitado, os membros ativos deste grupo
+        """
+        grupos = GrupoGestor.objects.filter(data_finalizacao=None)
+        if membros:
+            ativos = MembroGestor.objects.filter(data_desligamento=None)
+            grupos = grupos.prefetch_related(
+                models.Prefetch('membros', queryset=ativos,
+                                to_attr='membros_ativos'))
+
+        return self.prefetch_related(
+            models.Prefetch('grupo_gestor', queryset=grupos,
+                            to_attr='grupos_gestores_vigentes'))
+
+    def with_current_management(self):
+        """
+        Carrega em lote o gestor atual (com seu usuário), o grupo gestor
+        vigente e os membros ativos deste grupo, evitando uma consulta por
+        Praça ao serializar listas.
+        """
+        return self.with_current_gestor().with_current_grupo_gestor()
+
+    def with_active_rh(self):
+        """
+        Carrega em lote os Recursos Humanos ativos de cada Praça
+        """
+        rh_ativos = Rh.objects.filter(data_saida=None)
+
+        return self.prefetch_related(
+            models.Prefetch('rh', queryset=rh_ativos, to_attr='rh_ativos'))
+
+    def touch(self):
+        """
+        Marca as Praças do queryset como alteradas, atualizando a versão
+        utilizada nas requisições condicionais e invalidando as respostas
+        em cache.
+        """
+        pracas = list(self.values_list('pk', flat=True))
+        updated = self.update(updated_at=timezone.now())
+        invalidate_praca_responses(pracas)
+        return updated
+
+    def update_search_vector(self):
+        """
+        Recalcula o vetor de busca textual das Praças do queryset
+        """
+        return self.update(search_vector=(
+            SearchVector('nome', weight='A', config=TEXT_SEARCH_CONFIG) +
+            SearchVector('municipio', weight='B', config=TEXT_SEARCH_CONFIG) +
+            SearchVector('uf', 'bairro', weight='C',
+                         config=TEXT_SEARCH_CONFIG)
+        ))
+
+    def autocomplete(self, term):
+        """
+        Retorna as Praças cujo nome, municipio ou bairro contenham ou sejam
+        semelhantes ao termo informado, ordenadas pela similaridade.
+        """
+        condition = Q()
+        for field in ('nome', 'municipio', 'bairro'):
+            condition |= Q(**{field + '__icontains': term})
+            condition |= Q(**{field + '__trigram_similar': term})
+
+        return self.filter(condition).annotate(similaridade=Greatest(
+            TrigramSimilarity('nome', term),
+            TrigramSimilarity('municipio', term),
+            TrigramSimilarity('bairro', term),
+        )).order_by('-similaridade', 'uf', 'municipio')
+
+    def statistics(self):
+        """
+        Retorna o total de Praças e a soma dos repasses, no geral e agrupados
+        por região, UF, situação e modelo, e o total de Praças com gestor e
+        com grupo gestor vigentes.
+        """
+        from gestor.models import Gestor
+
+        def count(condition):
+            return Sum(Case(When(condition, then=1), default=0,
+                            output_field=models.IntegerField()))
+
+        def total(condition):
+            return Sum(Case(When(condition, then=F('repasse')),
+                            output_field=models.DecimalField(
+                                max_digits=12, decimal_places=2)))
+
+        # Todos os totais são calculados em uma única consulta, com uma
+        # coluna por valor de cada agrupamento
+        agrupamentos = OrderedDict(
+            (field, sorted(self.model._meta.get_field(field).choices))
+            for field in ('regiao', 'uf', 'situacao', 'modelo'))
+        aggregates = {
+            'total': Count('pk'),
+            'repasse': Sum('repasse'),
+            'com_gestor': count(Q(pk__in=Gestor.objects.filter(
+                atual=True, data_encerramento_gestao=None).values('praca'))),
+            'com_grupo_gestor': count(Q(pk__in=GrupoGestor.objects.filter(
+                data_finalizacao=None).values('praca'))),
+        }
+        for field, choices in agrupamentos.items():
+            for value, descricao in choices:
+                condition = Q(**{field: value})
+                aggregates['{}_{}_total'.format(field, value)] = count(
+                    condition)
+                aggregates['{}_{}_repasse'.format(field, value)] = total(
+                    condition)
+
+        resultado = self.aggregate(**aggregates)
+        estatisticas = {name: resultado[name] for name in (
+            'total', 'repasse', 'com_gestor', 'com_grupo_gestor')}
+        for field, choices in agrupamentos.items():
+            estatisticas[field] = [
+                {field: value, 'descricao': descricao,
+                 'total': resultado['{}_{}_total'.format(field, value)],
+                 'repasse': resultado['{}_{}_repasse'.format(field, value)]}
+                for value, descricao in choices
+                if resultado['{}_{}_total'.format(field, value)]]
+
+        return estatisticas
+
+    def for_fields(self, fields, expand=None):
+        """
+        Carrega em lote apenas as relações exibidas pelos campos informados.
+        Os membros do grupo gestor só são carregados quando o grupo for
+        expandido (`expand` None expande todos os campos).
+        """
+        queryset = self
+        if 'gestor' in fields:
+            queryset = queryset.with_current_gestor()
+        if 'grupo_gestor' in fields:
+            queryset = queryset.with_current_grupo_gestor(
+                membros=expand is None or 'grupo_gestor' in expand)
+        if 'rh' in fields:
+            queryset = queryset.with_active_rh()
+
+        return queryset.prefetch_related(
+            *[lookup for field, lookup in self.DETAIL_PREFETCHES.items()
+              if field in fields])
+
+
 class Praca(IdPubIdentifier):
     nome = models.CharField(
             _('Nome da Praça'),
@@ -195,6 +396,18 @@ class Praca(IdPubIdentifier):
         null=True,
         blank=True,
         )
+    geohash = models.CharField(
+        _('Geohash'),
+        max_length=12,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+        )
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(_('Última alteração'), auto_now=True)
+
+    objects = PracaQuerySet.as_manager()
 
     def get_latlong(self):
         """
@@ -213,6 +426,10 @@ class Praca(IdPubIdentifier):
         """
         Retorna o atual gestor da Praça
         """
+        if hasattr(self, 'gestores_atuais'):
+            gestores = self.gestores_atuais
+            return gestores[0] if len(gestores) == 1 else None
+
         try:
             return self.gestor.filter(data_encerramento_gestao=None).get(atual=True)
         except:
@@ -222,6 +439,10 @@ class Praca(IdPubIdentifier):
         """
         Retorna o grupo gestor vigente da Praça
         """
+        if hasattr(self, 'grupos_gestores_vigentes'):
+            grupos = self.grupos_gestores_vigentes
+            return grupos[0] if len(grupos) == 1 else None
+
         try:
             return self.grupo_gestor.get(data_finalizacao=None)
         except:
@@ -231,6 +452,8 @@ class Praca(IdPubIdentifier):
         """
         Retorna os Recursos Humanos ativos da Praça
         """
+        if hasattr(self, 'rh_ativos'):
+            return self.rh_ativos
 
         try:
             return self.rh.filter(data_saida=None)
@@ -252,6 +475,14 @@ class Praca(IdPubIdentifier):
 
     class Meta:
         ordering = ['uf', 'municipio']
+        indexes = [
+            models.Index(fields=['uf', 'municipio', 'id_pub']),
+            models.Index(fields=['lat', 'long']),
+            GinIndex(fields=['search_vector']),
+            TrigramIndex(fields=['nome']),
+            TrigramIndex(fields=['municipio']),
+            TrigramIndex(fields=['bairro']),
+        ]
         verbose_name = 'praca'
         verbose_name_plural = 'pracas'
 
@@ -332,6 +563,37 @@ class Parceiro(IdPubIdentifier):
         null=True,
         blank=True)
     imagem = models.FileField(blank=True, upload_to=upload_image_to)
+    geohash = models.CharField(
+        _('Geohash'),
+        max_length=12,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+        )
+    distancia_praca = models.FloatField(
+        _('Distância até a Praça (m)'),
+        null=True,
+        editable=False
+        )
+    praca_mais_proxima = models.ForeignKey(
+        Praca,
+        related_name='+',
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL
+        )
+    distancia_praca_mais_proxima = models.FloatField(
+        _('Distância até a Praça mais próxima (m)'),
+        null=True,
+        editable=False,
+        db_index=True
+        )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lat', 'long']),
+        ]
 
 
 class GrupoGestor(IdPubIdentifier):
@@ -373,6 +635,9 @@ class GrupoGestor(IdPubIdentifier):
         """
         Retorna os membros gestores do Grupo
         """
+        if hasattr(self, 'membros_ativos'):
+            return self.membros_ativos
+
         try:
             return self.membros.filter(data_desligamento=None)
         except:
@@ -497,6 +762,9 @@ class Rh(IdPubIdentifier):
 
     class Meta:
         ordering = ['nome', 'data_entrada']
+        indexes = [
+            models.Index(fields=['praca', 'nome', 'data_entrada', 'id_pub']),
+        ]
 
 
 class Ator(IdPubIdentifier):
@@ -541,6 +809,37 @@ class Ator(IdPubIdentifier):
         null=True,
         blank=True
         )
+    geohash = models.CharField(
+        _('Geohash'),
+        max_length=12,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+        )
+    distancia_praca = models.FloatField(
+        _('Distância até a Praça (m)'),
+        null=True,
+        editable=False
+        )
+    praca_mais_proxima = models.ForeignKey(
+        Praca,
+        related_name='+',
+        null=True,
+        editable=False,
+        on_delete=models.SET_NULL
+        )
+    distancia_praca_mais_proxima = models.FloatField(
+        _('Distância até a Praça mais próxima (m)'),
+        null=True,
+        editable=False,
+        db_index=True
+        )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lat', 'long']),
+        ]
 
     def get_absolute_url(self):
         app_name = self._meta.app_label
@@ -548,3 +847,288 @@ class Ator(IdPubIdentifier):
         url = app_name + ':' + basename + '-detail'
 
         return reverse(url, kwargs={'praca_pk': self.praca.pk, 'pk': self.pk})
+
+
+class ResumoPracaManager(models.Manager):
+
+    def refresh(self, pracas=None):
+        """
+        Reconstrói o resumo das Praças informadas (ou de todas as Praças)
+        a partir dos dados atuais da Praça, do seu gestor e do usuário.
+        """
+        queryset = Praca.objects.with_current_gestor()
+        if pracas is not None:
+            queryset = queryset.filter(pk__in=pracas)
+
+        resumos = [self.model.from_praca(praca) for praca in queryset]
+
+        with transaction.atomic():
+            antigos = self.all() if pracas is None else self.filter(
+                praca__in=pracas)
+            antigos.delete()
+            self.bulk_create(resumos)
+
+        return len(resumos)
+
+
+class ResumoPraca(models.Model):
+    """
+    Modelo de leitura desnormalizado com as colunas da listagem de Praças,
+    mantido atualizado através de signals e reconstruido integralmente pelo
+    comando `rebuild_praca_summary`.
+    """
+    praca = models.OneToOneField(Praca, primary_key=True,
+                                 related_name='resumo',
+                                 on_delete=models.CASCADE)
+    nome = models.CharField(max_length=250, blank=True)
+    contrato = models.IntegerField()
+    regiao = models.CharField(max_length=2, choices=REGIOES_CHOICES)
+    uf = models.CharField(max_length=2, choices=STATE_CHOICES)
+    municipio = models.CharField(max_length=140)
+    modelo = models.CharField(max_length=1, choices=MODELO_CHOICES)
+    situacao = models.CharField(max_length=1, choices=SITUACAO_CHOICES)
+    data_inauguracao = models.DateField(blank=True, null=True)
+    header_img = models.FileField(blank=True)
+    repasse = models.DecimalField(decimal_places=2, max_digits=12,
+                                  null=True, blank=True)
+    gestor_id_pub = models.UUIDField(null=True)
+    gestor_user_id_pub = models.UUIDField(null=True)
+    gestor_nome = models.CharField(max_length=200, null=True)
+    gestor_email = models.EmailField(null=True)
+    gestor_profile_picture_url = models.URLField(null=True)
+    gestor_data_inicio_gestao = models.DateField(null=True)
+
+    objects = ResumoPracaManager()
+
+    @classmethod
+    def from_praca(cls, praca):
+        resumo = cls(
+            praca=praca,
+            nome=praca.nome,
+            contrato=praca.contrato,
+            regiao=praca.regiao,
+            uf=praca.uf,
+            municipio=praca.municipio,
+            modelo=praca.modelo,
+            situacao=praca.situacao,
+            data_inauguracao=praca.data_inauguracao,
+            header_img=praca.header_img.name or '',
+            repasse=praca.repasse,
+        )
+
+        gestor = praca.get_manager()
+        if gestor:
+            resumo.gestor_id_pub = gestor.pk
+            resumo.gestor_data_inicio_gestao = gestor.data_inicio_gestao
+            if gestor.user:
+                resumo.gestor_user_id_pub = gestor.user.pk
+                resumo.gestor_nome = gestor.user.full_name
+                resumo.gestor_email = gestor.user.email
+                resumo.gestor_profile_picture_url = (
+                    gestor.user.profile_picture_url)
+
+        return resumo
+
+    def get_absolute_url(self):
+        return reverse('pracas:praca-detail', kwargs={'pk': self.praca_id})
+
+    class Meta:
+        ordering = ['uf', 'municipio']
+        indexes = [
+            models.Index(fields=['uf', 'municipio', 'praca']),
+        ]
+        db_table = 'praca_summary'
+
+
+# Praças sendo excluidas na thread atual. Durante a exclusão em cascata os
+# signals dos dependentes não devem reconstruir o resumo da Praça, que seria
+# incluido novamente antes da exclusão da própria Praça.
+_deleting = threading.local()
+
+
+def praca_being_deleted(pk):
+    """
+    Retorna se a Praça está sendo excluida na thread atual
+    """
+    return pk in getattr(_deleting, 'pracas', ())
+
+
+@receiver(pre_delete, sender=Praca)
+def mark_praca_deleted(sender, instance, **kwargs):
+    """
+    Marca a Praça como em exclusão até o fim da exclusão em cascata
+    """
+    if not hasattr(_deleting, 'pracas'):
+        _deleting.pracas = set()
+    _deleting.pracas.add(instance.pk)
+
+
+@receiver(post_delete, sender=Praca)
+def unmark_praca_deleted(sender, instance, **kwargs):
+    """
+    Remove a marca de exclusão da Praça
+    """
+    getattr(_deleting, 'pracas', set()).discard(instance.pk)
+
+
+@receiver(post_save, sender=Praca)
+def refresh_praca_summary(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza o resumo da Praça sempre que ela for alterada
+    """
+    if not raw:
+        ResumoPraca.objects.refresh([instance.pk])
+
+
+@receiver(post_save, sender=Praca)
+@receiver(post_delete, sender=Praca)
+def invalidate_praca_cache(sender, instance, **kwargs):
+    """
+    Invalida as respostas em cache da Praça sempre que ela for alterada
+    """
+    invalidate_praca_responses([instance.pk])
+
+
+@receiver(post_save, sender=Praca)
+@receiver(post_delete, sender=Praca)
+def invalidate_praca_geojson(sender, instance, **kwargs):
+    """
+    Invalida o mapa de Praças quando a localização ou as propriedades
+    exibidas da Praça forem alteradas
+    """
+    from .geojson import praca_changed
+    praca_changed(instance, deleted='created' not in kwargs)
+
+
+@receiver(post_save, sender=Praca)
+@receiver(post_delete, sender=Praca)
+def move_praca_in_spatial_index(sender, instance, **kwargs):
+    """
+    Reconstrói o indice espacial de Praças quando uma Praça for incluida,
+    movida ou removida
+    """
+    from .spatial import index
+    index.praca_moved(instance, deleted='created' not in kwargs)
+
+
+@receiver(post_save, sender=Ator)
+@receiver(post_save, sender=Parceiro)
+def update_catchment(sender, instance, raw=False, **kwargs):
+    """
+    Recalcula a distância do ator ou parceiro até a sua Praça e até a Praça
+    mais próxima
+    """
+    from .catchment import refresh_catchment
+    if not raw:
+        refresh_catchment(sender, sender.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Praca)
+@receiver(pre_save, sender=Ator)
+@receiver(pre_save, sender=Parceiro)
+def remember_coordinates(sender, instance, raw=False, **kwargs):
+    """
+    Guarda as coordenadas gravadas do registro antes da alteração
+    """
+    if not raw:
+        instance._coordenadas_gravadas = sender.objects.filter(
+            pk=instance.pk).values_list('lat', 'long').first()
+
+
+@receiver(post_save, sender=Praca)
+@receiver(post_delete, sender=Praca)
+def update_catchment_from_praca(sender, instance, raw=False, **kwargs):
+    """
+    Recalcula as distâncias dos atores e parceiros afetados quando uma
+    Praça for incluida, movida ou removida
+    """
+    from .catchment import praca_moved
+    from .spatial import point
+    if raw:
+        return
+
+    deleted = 'created' not in kwargs
+    if deleted:
+        anteriores, atuais = instance.get_latlong(), None
+    else:
+        anteriores = getattr(instance, '_coordenadas_gravadas', None)
+        atuais = instance.get_latlong()
+
+    if point(anteriores) != point(atuais):
+        praca_moved(instance, deleted=deleted)
+
+
+@receiver(pre_save, sender=Praca)
+@receiver(pre_save, sender=Ator)
+@receiver(pre_save, sender=Parceiro)
+def set_geohash(sender, instance, **kwargs):
+    """
+    Mantém o geohash de acordo com as coordenadas do registro
+    """
+    if instance.lat is None or instance.long is None:
+        instance.geohash = None
+    else:
+        instance.geohash = encode_geohash(
+            float(instance.lat), float(instance.long))
+
+
+@receiver(post_save, sender=Praca)
+def update_praca_search_vector(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza o vetor de busca textual da Praça sempre que ela for alterada
+    """
+    if not raw:
+        Praca.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=ImagemPraca)
+@receiver(post_delete, sender=ImagemPraca)
+@receiver(post_save, sender=Parceiro)
+@receiver(post_delete, sender=Parceiro)
+@receiver(post_save, sender=GrupoGestor)
+@receiver(post_delete, sender=GrupoGestor)
+@receiver(post_save, sender=MembroUgl)
+@receiver(post_delete, sender=MembroUgl)
+@receiver(post_save, sender=Rh)
+@receiver(post_delete, sender=Rh)
+@receiver(post_save, sender=Ator)
+@receiver(post_delete, sender=Ator)
+def touch_praca(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza a versão da Praça quando um dos seus registros relacionados
+    for alterado.
+    """
+    if instance.praca_id and not raw:
+        Praca.objects.filter(pk=instance.praca_id).touch()
+
+
+@receiver(post_save, sender=MembroGestor)
+@receiver(post_delete, sender=MembroGestor)
+def touch_praca_from_membro_gestor(sender, instance, raw=False, **kwargs):
+    """
+    Atualiza a versão da Praça quando um membro do seu grupo gestor for
+    alterado.
+    """
+    if not raw:
+        Praca.objects.filter(grupo_gestor=instance.grupo_gestor_id).touch()
+
+
+@receiver(post_save, sender=Praca)
+@receiver(post_delete, sender=Praca)
+@receiver(post_save, sender=Ator)
+@receiver(post_delete, sender=Ator)
+@receiver(post_save, sender=Parceiro)
+@receiver(post_delete, sender=Parceiro)
+def move_map_point(sender, instance, **kwargs):
+    """
+    Atualiza os clusters do mapa quando um ponto for incluido, movido ou
+    removido
+    """
+    from .clusters import point_moved
+    from .spatial import point
+
+    if 'created' in kwargs:
+        point_moved(point(getattr(instance, '_coordenadas_gravadas', None)),
+                    point((instance.lat, instance.long)))
+    else:
+        point_moved(point((instance.lat, instance.long)))
@@ -0,0 +1,129 @@
+import gzip
+import logging
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from rest_framework.renderers import JSONRenderer
+
+from core.cache import current_generations
+from core.http import accepts_gzip
+
+from .models import Praca
+from .serializers import PracaSerializer
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=settings.PRERENDER_WORKERS)
+
+
+def prerender_keys(pracas):
+    """
+    Retorna a chave do JSON pré-renderizado de cada Praça, vinculada à
+    geração atual do seu cache de respostas.
+    """
+    generations = current_generations(
+        ['praca:{}'.format(pk) for pk in pracas])
+    return {pk: 'praca-json:{}:{}'.format(pk, generation)
+            for pk, generation in zip(pracas, generations)}
+
+
+def base_request():
+    """
+    Retorna uma requisição para `API_BASE_URL`, utilizada na montagem das
+    URLs absolutas dos arquivos da Praça.
+    """
+    url = urlsplit(settings.API_BASE_URL)
+    return RequestFactory().get(
+        '/', HTTP_HOST=url.netloc, secure=url.scheme == 'https')
+
+
+def render_pracas(pracas):
+    """
+    Serializa as Praças informadas e armazena no cache o JSON resultante,
+    original e compactado com gzip.
+    """
+    if not settings.API_BASE_URL:
+        return 0
+
+    # A geração é lida antes dos dados: uma alteração concorrente invalida
+    # a chave em vez de deixar um conteúdo desatualizado em uso.
+    keys = prerender_keys(list(pracas))
+    request = base_request()
+
+    entries = {}
+    queryset = Praca.objects.filter(pk__in=keys).for_fields(
+        PracaSerializer.Meta.fields)
+    for praca in queryset:
+        data = PracaSerializer(praca, context={'request': request}).data
+        content = JSONRenderer().render(data)
+        entries[keys[praca.pk]] = (content, gzip.compress(content))
+
+    caches['default'].set_many(entries, settings.PRERENDER_TIMEOUT)
+    return len(entries)
+
+
+def _render_in_background(pracas):
+    try:
+        render_pracas(pracas)
+    except Exception:
+        logger.exception('Falha ao pré-renderizar as Praças %s', pracas)
+    finally:
+        connection.close()
+
+
+def schedule_prerender(pracas):
+    """
+    Agenda a pré-renderização das Praças para após a confirmação da
+    transação atual.
+    """
+    if settings.API_BASE_URL:
+        pracas = list(pracas)
+        transaction.on_commit(
+            lambda: executor.submit(_render_in_background, pracas))
+
+
+def prerendered_response(request, pk, etag=None):
+    """
+    Retorna o detalhe pré-renderizado da Praça, ou None quando ele não
+    estiver disponível para a requisição. O ETag informado recebe o sufixo
+    `-gzip` na resposta compactada.
+    """
+    base_url = settings.API_BASE_URL
+    if (not base_url or request.query_params or
+            request.accepted_media_type != 'application/json' or
+            request.build_absolute_uri('/') != base_url.rstrip('/') + '/'):
+        return None
+
+    try:
+        pk = uuid.UUID(str(pk))
+    except ValueError:
+        return None
+
+    key = prerender_keys([pk])[pk]
+    entry = caches['default'].get(key)
+    if entry is None:
+        schedule_prerender([pk])
+        return None
+
+    content, compressed = entry
+    if accepts_gzip(request):
+        response = HttpResponse(compressed, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+        if etag:
+            etag = '{}-gzip"'.format(etag[:-1])
+    else:
+        response = HttpResponse(content, content_type='application/json')
+
+    if etag:
+        response['ETag'] = etag
+    response['Vary'] = 'Accept, Accept-Encoding'
+    return response
@@ -0,0 +1,63 @@
+from functools import reduce
+
+from django.db.models import Q
+
+from core.db import bulk_update
+from core.functions import Distance
+from core.geohash import encode
+from core.geohash import neighbors
+from core.geohash import precision_for
+
+from .clusters import POINT_MODELS
+
+
+def update_geohashes(model, queryset=None):
+    """
+    Preenche o geohash dos registros do queryset (ou de todos os registros
+    do modelo) a partir das coordenadas, gravando apenas os que tiverem sido
+    alterados. Retorna o total de registros alterados.
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+
+    changed = []
+    for pk, lat, long, geohash in queryset.values_list(
+            'pk', 'lat', 'long', 'geohash').iterator():
+        value = None
+        if lat is not None and long is not None:
+            value = encode(float(lat), float(long))
+        if value != geohash:
+            changed.append((pk, value))
+
+    bulk_update(model, ('geohash', ), changed)
+    return len(changed)
+
+
+def nearby(lat, long, radius, limit):
+    """
+    Retorna as Praças, atores e parceiros a até `radius` metros da
+    coordenada, ordenados pela distância.
+
+    Os candidatos de cada modelo são selecionados em uma única consulta pelos
+    prefixos de geohash da célula da coordenada e das suas vizinhas (com
+    precisão suficiente para cobrir o raio), utilizando o índice do geohash,
+    e depois filtrados pela distância exata.
+    """
+    cells = neighbors(lat, long, precision_for(lat, radius))
+    prefixes = reduce(lambda condition, cell: condition | Q(
+        geohash__startswith=cell), cells, Q())
+
+    results = []
+    for tipo, model in POINT_MODELS:
+        fields = ['id_pub', 'nome', 'lat', 'long']
+        if tipo != 'praca':
+            fields.append('praca')
+
+        queryset = model.objects.filter(prefixes).annotate(
+            distancia=Distance('lat', 'long', lat, long),
+        ).filter(distancia__lte=radius).order_by('distancia')
+        results.extend(dict(row, tipo=tipo) for row in
+                       queryset.values(*fields + ['distancia'])[:limit])
+
+    results.sort(key=lambda result: result['distancia'])
+    return results[:limit]
@@ -1,7 +1,12 @@
+from django.contrib.auth import get_user_model
+
 from rest_framework import serializers
 
+from core.serializers import DynamicFieldsModelSerializer
+
 from .models import GrupoGestor
 from .models import Praca
+from .models import ResumoPraca
 from .models import Parceiro
 from .models import ImagemPraca
 from .models import MembroGestor
@@ -10,28 +15,7 @@ from .models import Rh
 from .models import Ator
 
 
-class DynamicFieldsModelSerializer(serializers.ModelSerializer):
-    """
-    A ModelSerializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
-    """
-
-    def __init__(self, *args, **kwargs):
-        # Don't pass the 'fields' arg up to the superclass
-        fields = kwargs.pop('fields', None)
-
-        # Instantiate the superclass normally
-        super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
-
-        if fields is not None:
-            # Drop any fields that are not specified in the `fields` argument.
-            allowed = set(fields)
-            existing = set(self.fields.keys())
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
-
-
-class MembroGestorSerializer(serializers.ModelSerializer):
+class MembroGestorSerializer(DynamicFieldsModelSerializer):
     origem_descricao = serializers.CharField(
         source='get_origem_display', read_only=True)
 
@@ -40,7 +24,7 @@ class MembroGestorSerializer(serializers.ModelSerializer):
         fields = ('id_pub', 'nome', 'origem', 'origem_descricao')
 
 
-class MembroGestorDetailSerializer(serializers.ModelSerializer):
+class MembroGestorDetailSerializer(DynamicFieldsModelSerializer):
     origem_descricao = serializers.CharField(
         source='get_origem_display', read_only=True)
     tipo_documento_descricao = serializers.CharField(
@@ -54,10 +38,13 @@ class MembroGestorDetailSerializer(serializers.ModelSerializer):
                   'documento_posse')
 
 
-class GrupoGestorSerializer(serializers.ModelSerializer):
+class GrupoGestorSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(read_only=True, source='get_absolute_url')
     membros = MembroGestorSerializer(source='get_membros_ativos', read_only=True, many=True)
 
+    field_columns = {'membros': ()}
+    expandable_fields = ('membros',)
+
     class Meta:
         model = GrupoGestor
         fields = ('url', 'id_pub', 'data_instituicao', 'data_finalizacao',
@@ -65,7 +52,7 @@ class GrupoGestorSerializer(serializers.ModelSerializer):
                   'previsao_espacos', 'membros')
 
 
-class MembroUglSerializer(serializers.ModelSerializer):
+class MembroUglSerializer(DynamicFieldsModelSerializer):
     tipo_descricao = serializers.CharField(
     source='get_tipo_display', read_only=True)
     class Meta:
@@ -73,7 +60,7 @@ class MembroUglSerializer(serializers.ModelSerializer):
         fields = ('id_pub', 'nome', 'tipo', 'tipo_descricao', 'telefone', 'email')
 
 
-class ImagemPracaSerializer(serializers.ModelSerializer):
+class ImagemPracaSerializer(DynamicFieldsModelSerializer):
     praca = serializers.PrimaryKeyRelatedField(required=False, read_only=True)
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     header = serializers.BooleanField(default=False)
@@ -85,7 +72,7 @@ class ImagemPracaSerializer(serializers.ModelSerializer):
                   'descricao')
 
 
-class PracaBaseSerializer(serializers.ModelSerializer):
+class PracaBaseSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     modelo_descricao = serializers.CharField(
         source='get_modelo_display', read_only=True)
@@ -94,23 +81,34 @@ class PracaBaseSerializer(serializers.ModelSerializer):
     gestor = serializers.SerializerMethodField()
     grupo_gestor = serializers.SerializerMethodField()
 
+    field_columns = {'gestor': (), 'grupo_gestor': ()}
+    expandable_fields = ('gestor', 'grupo_gestor')
+
     def get_gestor(self, obj):
-        if obj.get_manager():
+        gestor = obj.get_manager()
+        if gestor and not self.is_expanded('gestor'):
+            return gestor.pk
+        elif gestor:
             from gestor.serializers import GestorBaseSerializer
-            serializer = GestorBaseSerializer(obj.get_manager())
+            serializer = GestorBaseSerializer(
+                gestor, expand=self.get_expand('gestor'))
             return serializer.data
         else:
             return None
 
     def get_grupo_gestor(self, obj):
-        if obj.get_grupogestor():
-            serializer = GrupoGestorSerializer(obj.get_grupogestor())
+        grupo_gestor = obj.get_grupogestor()
+        if grupo_gestor and not self.is_expanded('grupo_gestor'):
+            return grupo_gestor.pk
+        elif grupo_gestor:
+            serializer = GrupoGestorSerializer(
+                grupo_gestor, expand=self.get_expand('grupo_gestor'))
             return serializer.data
         else:
             return None
 
 
-class PracaListSerializer(PracaBaseSerializer, DynamicFieldsModelSerializer):
+class PracaListSerializer(PracaBaseSerializer):
     class Meta:
         model = Praca
         fields = ('url', 'id_pub', 'nome', 'municipio', 'uf', 'regiao',
@@ -120,7 +118,58 @@ class PracaListSerializer(PracaBaseSerializer, DynamicFieldsModelSerializer):
         read_only_fields = ('url', 'gestor', 'header_img', 'id_pub')
 
 
-class ParceiroBaseSerializer(serializers.ModelSerializer):
+class PracaResumoSerializer(DynamicFieldsModelSerializer):
+    """
+    Serializa a listagem de Praças a partir do resumo desnormalizado, com a
+    mesma representação do PracaListSerializer.
+    """
+    url = serializers.URLField(source='get_absolute_url', read_only=True)
+    id_pub = serializers.UUIDField(source='praca_id', read_only=True)
+    modelo_descricao = serializers.CharField(
+        source='get_modelo_display', read_only=True)
+    situacao_descricao = serializers.CharField(
+        source='get_situacao_display', read_only=True)
+    gestor = serializers.SerializerMethodField()
+
+    field_columns = {
+        'gestor': ('gestor_id_pub', 'gestor_user_id_pub', 'gestor_nome',
+                   'gestor_email', 'gestor_profile_picture_url',
+                   'gestor_data_inicio_gestao'),
+    }
+    expandable_fields = ('gestor',)
+
+    def get_gestor(self, obj):
+        if not obj.gestor_id_pub:
+            return None
+        elif not self.is_expanded('gestor'):
+            return obj.gestor_id_pub
+
+        # O gestor atual é remontado a partir das colunas do resumo e
+        # serializado da mesma forma que no PracaListSerializer
+        from gestor.models import Gestor
+        from gestor.serializers import GestorBaseSerializer
+        user = None
+        if obj.gestor_user_id_pub:
+            user = get_user_model()(
+                id_pub=obj.gestor_user_id_pub, full_name=obj.gestor_nome,
+                email=obj.gestor_email,
+                profile_picture_url=obj.gestor_profile_picture_url)
+        gestor = Gestor(
+            id_pub=obj.gestor_id_pub, praca_id=obj.praca_id, user=user,
+            data_inicio_gestao=obj.gestor_data_inicio_gestao,
+            data_encerramento_gestao=None, atual=True)
+
+        serializer = GestorBaseSerializer(
+            gestor, expand=self.get_expand('gestor'))
+        return serializer.data
+
+    class Meta:
+        model = ResumoPraca
+        fields = PracaListSerializer.Meta.fields
+        read_only_fields = fields
+
+
+class ParceiroBaseSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Parceiro
         fields = ('praca', 'nome', 'endereco', 'contato', 'telefone', 'email',
@@ -140,7 +189,7 @@ class ParceiroListSerializer(ParceiroBaseSerializer):
         fields = ('id_pub', 'nome', 'email', 'ramo_atividade', 'imagem')
 
 
-class RhListSerializer(serializers.ModelSerializer):
+class RhListSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
 
     class Meta:
@@ -149,7 +198,7 @@ class RhListSerializer(serializers.ModelSerializer):
                   'data_entrada', 'data_saida')
 
 
-class RhDetailSerializer(serializers.ModelSerializer):
+class RhDetailSerializer(DynamicFieldsModelSerializer):
     url = serializers.URLField(source='get_absolute_url', read_only=True)
     escolaridade_descricao = serializers.CharField(source='get_escolaridade_display', read_only=True)
     formacao_descricao = serializers.CharField(source='get_formacao_display', read_only=True)
@@ -165,13 +214,13 @@ class RhDetailSerializer(serializers.ModelSerializer):
                   'local_trabalho_descricao', 'data_entrada', 'data_saida',)
 
 
-class AtorListSerializer(serializers.ModelSerializer):
+class AtorListSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Ator
         fields = ('id_pub', 'nome', 'area', 'imagem')
 
 
-class AtorDetailSerializer(serializers.ModelSerializer):
+class AtorDetailSerializer(DynamicFieldsModelSerializer):
     area_descricao = serializers.CharField(source='get_area_display',
                                            read_only=True)
     descricao_descricao = serializers.CharField(source='get_descricao_display',
@@ -192,6 +241,8 @@ class PracaSerializer(PracaBaseSerializer):
     rh = RhListSerializer(source='get_rh_ativos', many=True, read_only=True)
     atores = AtorListSerializer(many=True, read_only=True)
 
+    field_columns = {'gestor': (), 'grupo_gestor': (), 'rh': ()}
+
     class Meta:
         model = Praca
         fields = ('url', 'nome', 'slug', 'id_pub', 'contrato', 'logradouro',
@@ -212,11 +263,14 @@ class DistanciaSerializer(PracaListSerializer):
     latlong = serializers.SerializerMethodField()
     distancia = serializers.SerializerMethodField()
 
+    field_columns = {'gestor': (), 'grupo_gestor': (),
+                     'latlong': ('lat', 'long'), 'distancia': ('lat', 'long')}
+
     def get_latlong(self, obj):
         return "{}, {}".format(obj.lat, obj.long)
 
     def get_distancia(self, obj):
-        return obj.get_distance(self.context['origem'])
+        return round(self.context['distancias'][obj.pk], -2)
 
     class Meta:
         model = Praca
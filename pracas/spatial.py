@@ -0,0 +1,223 @@
+import heapq
+import math
+import threading
+
+import numpy as np
+
+from geopy.distance import vincenty
+
+from core.cache import current_generations
+from core.cache import invalidate_cache_generations
+from core.functions import EARTH_RADIUS
+
+from .models import Praca
+
+
+def point(latlong):
+    """
+    Retorna a coordenada (lat, long) como números, ou None quando incompleta
+    """
+    if latlong is None or None in latlong:
+        return None
+    return tuple(float(value) for value in latlong)
+
+
+def to_xyz(lat, long):
+    """
+    Converte latitude e longitude em coordenadas na esfera unitária, onde a
+    distância euclidiana (corda) cresce com a distância sobre a superfície.
+    """
+    lat, long = math.radians(lat), math.radians(long)
+    return (math.cos(lat) * math.cos(long),
+            math.cos(lat) * math.sin(long),
+            math.sin(lat))
+
+
+def chord_to_meters(chord):
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, chord / 2))
+
+
+def meters_to_chord(meters):
+    return 2 * math.sin(min(math.pi, meters / EARTH_RADIUS) / 2)
+
+
+def haversine(lat, long, lats, longs):
+    """
+    Calcula, em uma única operação vetorizada, a distância em metros da
+    coordenada de origem até cada par dos arrays de latitudes e longitudes
+    (em graus). Origens em arrays de uma coluna resultam em uma matriz de
+    distâncias (origens x destinos).
+    """
+    lat, long = np.radians(lat), np.radians(long)
+    lats, longs = np.radians(lats), np.radians(longs)
+
+    h = (np.sin((lats - lat) / 2) ** 2 +
+         np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def refine_geodesic(origin, results, points):
+    """
+    Recalcula com a fórmula de Vincenty (elipsoide WGS-84) a distância até
+    cada resultado, no formato [(id_pub, distância em metros)], reordenando
+    a lista. Utilizado apenas nos k resultados já selecionados.
+    """
+    return sorted(((pk, vincenty(origin, points[pk]).meters)
+                   for pk, distance in results),
+                  key=lambda result: result[1])
+
+
+class KDTree(object):
+    """
+    Árvore k-d sobre pontos tridimensionais, com consulta dos k vizinhos
+    mais próximos e limite opcional de distância.
+    """
+
+    def __init__(self, points):
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+
+        axis = depth % 3
+        points.sort(key=lambda point: point[0][axis])
+        median = len(points) // 2
+        return (points[median], axis,
+                self._build(points[:median], depth + 1),
+                self._build(points[median + 1:], depth + 1))
+
+    def nearest(self, point, k=None, max_distance=None):
+        """
+        Retorna os itens mais próximos do ponto, no formato
+        [(distância, item)], ordenados pela distância.
+        """
+        limit = math.inf if max_distance is None else max_distance ** 2
+        # Heap de máximo (distâncias negativas) com os melhores candidatos
+        heap = []
+
+        def bound():
+            if k is not None and len(heap) == k:
+                return min(limit, -heap[0][0])
+            return limit
+
+        def visit(node):
+            if node is None:
+                return
+
+            (coords, item), axis, left, right = node
+            distance = sum((a - b) ** 2 for a, b in zip(point, coords))
+            if distance <= bound():
+                heapq.heappush(heap, (-distance, item))
+                if k is not None and len(heap) > k:
+                    heapq.heappop(heap)
+
+            diff = point[axis] - coords[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if diff ** 2 <= bound():
+                visit(far)
+
+        if k is None or k > 0:
+            visit(self.root)
+        return sorted((math.sqrt(-distance), item)
+                      for distance, item in heap)
+
+
+class PracaIndex(object):
+    """
+    Indice espacial das Praças georreferenciadas, compartilhado pelo
+    processo, montado sob demanda e reconstruido quando a geração
+    `coordenadas` for invalidada.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.generation = None
+
+    def get_snapshot(self):
+        """
+        Retorna a árvore, as coordenadas de cada Praça e os arrays
+        utilizados no cálculo vetorizado, remontando-os quando a geração
+        `coordenadas` tiver sido alterada.
+        """
+        # A geração é lida antes dos dados, como nos demais caches
+        generation, = current_generations(['coordenadas'])
+        with self.lock:
+            if self.snapshot is None or self.generation != generation:
+                queryset = Praca.objects.exclude(lat=None).exclude(
+                    long=None).values_list('pk', 'lat', 'long')
+                points = {pk: (float(lat), float(long))
+                          for pk, lat, long in queryset}
+
+                pks = list(points)
+                tree = KDTree((to_xyz(*points[pk]), pk) for pk in pks)
+                coords = np.array([points[pk] for pk in pks]).reshape(-1, 2)
+
+                # O conjunto é substituido, e não alterado, para que as
+                # consultas em andamento continuem com o mesmo indice
+                self.snapshot = (tree, points, pks, coords)
+                self.generation = generation
+            return self.snapshot
+
+    def nearest(self, lat, long, k=None, radius=None, geodesic=False):
+        """
+        Retorna as Praças mais próximas da coordenada, limitadas a `k`
+        resultados e ao raio informado (em metros), no formato
+        [(id_pub, distância em metros)]. Com `geodesic`, as distâncias dos
+        resultados são refinadas no elipsoide.
+        """
+        tree, points, pks, coords = self.get_snapshot()
+
+        max_distance = None if radius is None else meters_to_chord(radius)
+        results = [(pk, chord_to_meters(chord)) for chord, pk in tree.nearest(
+            to_xyz(lat, long), k=k, max_distance=max_distance)]
+
+        if geodesic:
+            results = refine_geodesic((lat, long), results, points)
+        return results
+
+    def nearest_many(self, origins, k, chunk_size=500):
+        """
+        Retorna, para cada coordenada (lat, long) de `origins`, as k Praças
+        mais próximas no formato [(id_pub, distância em metros)]. As origens
+        são avaliadas em blocos, cada um contra todas as Praças em uma única
+        operação vetorizada.
+        """
+        tree, points, pks, coords = self.get_snapshot()
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        k = min(k, len(pks))
+
+        for start in range(0, len(origins), chunk_size):
+            block = origins[start:start + chunk_size]
+            if not k:
+                for origin in block:
+                    yield []
+                continue
+
+            distances = haversine(block[:, :1], block[:, 1:],
+                                  coords[:, 0], coords[:, 1])
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            for row, columns in zip(distances, nearest):
+                columns = columns[np.argsort(row[columns])]
+                yield [(pks[column], float(row[column]))
+                       for column in columns]
+
+    def praca_moved(self, praca, deleted=False):
+        """
+        Invalida o indice quando a Praça for incluida, removida ou tiver as
+        coordenadas alteradas.
+        """
+        point = None
+        if not deleted and praca.lat is not None and praca.long is not None:
+            point = (float(praca.lat), float(praca.long))
+
+        # Um indice desatualizado não permite saber se a Praça foi movida
+        generation, = current_generations(['coordenadas'])
+        if (self.snapshot is None or self.generation != generation or
+                self.snapshot[1].get(praca.pk) != point):
+            invalidate_cache_generations('coordenadas')
+
+
+index = PracaIndex()
@@ -237,3 +237,63 @@ def test_exclui_um_ator_de_determinada_praca_como_gestor_MinC(_admin_user, clien
                                              atores[0].pk}))
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_retorna_os_atores_de_uma_praca_dentro_de_um_raio(client):
+    """
+    Testa o retorno dos atores de uma Praça dentro do raio informado,
+    ordenados pela distância.
+    """
+
+    praca = mommy.make('Praca')
+    distante = mommy.make('Ator', praca=praca, lat=-15.9, long=-47.92)
+    proximo = mommy.make('Ator', praca=praca, lat=-15.79, long=-47.92)
+    mommy.make('Ator', praca=praca, lat=-3.1, long=-60.0)
+
+    response = client.get(_list(kwargs={'praca_pk': praca.pk}) +
+                          '?lat=-15.7833&long=-47.9167&raio_km=50')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [ator['id_pub'] for ator in response.data['results']] == [
+        str(proximo.pk), str(distante.pk)]
+
+
+def test_raio_invalido_na_busca_de_atores_de_uma_praca(client):
+    """
+    Testa a resposta da API ao receber uma coordenada ou um raio inválidos
+    """
+
+    praca = mommy.make('Praca')
+    url = _list(kwargs={'praca_pk': praca.pk})
+
+    for parametros in ('lat=-15.7&long=-47.9&raio_km=inf',
+                       'lat=-15.7&long=-47.9&raio_km=nan',
+                       'lat=nan&long=-47.9&raio_km=5',
+                       'lat=-95&long=-47.9&raio_km=5',
+                       'lat=-15.7&long=-47.9&raio_km=0',
+                       'lat=-15.7&raio_km=5'):
+        response = client.get(url + '?' + parametros)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_pagina_os_atores_de_uma_praca_dentro_de_um_raio(client):
+    """
+    Testa a paginação por cursor dos atores ordenados pela distância, com
+    atores à mesma distância, sem repetir ou omitir registros.
+    """
+
+    praca = mommy.make('Praca')
+    atores = [mommy.make('Ator', praca=praca, lat=lat, long=-47.92)
+              for lat in (-15.9, -15.79, -15.79, -15.79, -15.85, -15.85)]
+
+    url = (_list(kwargs={'praca_pk': praca.pk}) +
+           '?lat=-15.7833&long=-47.9167&raio_km=50&page_size=2')
+    vistos = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        vistos.extend(ator['id_pub'] for ator in response.data['results'])
+        url = response.data['next']
+
+    assert sorted(vistos) == sorted(str(ator.pk) for ator in atores)
+    assert vistos[-1] == str(atores[0].pk)
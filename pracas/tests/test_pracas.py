@@ -1,12 +1,24 @@
 import datetime
+import gzip
 import json
 import pytest
 
+from base64 import b64encode
+from types import SimpleNamespace
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
 from django.core.files import File
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.urlresolvers import reverse
 
 from django.core.urlresolvers import resolve
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 
@@ -14,12 +26,21 @@ from core.helper_functions import test_reverse as _
 
 from model_mommy import mommy
 
+from pracas.models import Ator
 from pracas.models import Praca
+from pracas.models import ResumoPraca
+from pracas.views import PracaViewSet
 
 from authentication.tests.test_user import _admin_user
 from authentication.tests.test_user import _common_user
 
 _list = _('pracas:praca-list')
+_autocomplete = _('pracas:praca-autocomplete')
+_geojson = _('pracas:praca-geojson')
+_clusters = _('pracas:praca-clusters')
+_estatisticas = _('pracas:praca-estatisticas')
+_exportar = _('pracas:praca-exportar')
+_abrangencia = _('pracas:praca-abrangencia')
 _detail = _('pracas:praca-detail')
 _imagem_list = _('pracas:imagempraca-list')
 _imagem_detail = _('pracas:imagempraca-detail')
@@ -59,8 +80,8 @@ def test_return_a_list_of_Pracas(client):
     response = client.get(_list(), format='json')
 
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response.data, list)
-    assert len(response.data) == 5
+    assert isinstance(response.data['results'], list)
+    assert len(response.data['results']) == 5
 
 
 def test_if_an_instance_of_list_result_has_some_properties(client):
@@ -79,9 +100,9 @@ def test_if_an_instance_of_list_result_has_some_properties(client):
     response = client.get(_list(), format='json')
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 5
+    assert len(response.data['results']) == 5
     for field in fields:
-        assert field in response.data[0]
+        assert field in response.data['results'][0]
 
 
 def test_returning_a_praca(client):
@@ -319,6 +340,23 @@ def test_excluir_praca_como_administrador(_admin_user, client):
     assert response.status_code == status.HTTP_204_NO_CONTENT
 
 
+def test_excluir_praca_com_gestor_como_administrador(_admin_user, client):
+    """
+    Testa a exclusão de uma Praça com gestor por um administrador, sem que o
+    resumo da Praça seja incluido novamente durante a exclusão em cascata.
+    """
+
+    praca = mommy.make(Praca)
+    mommy.make('Gestor', praca=praca, atual=True)
+
+    response = client.delete(_detail(kwargs={'pk': praca.pk}))
+    connection.check_constraints()
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not Praca.objects.filter(pk=praca.pk).exists()
+    assert not ResumoPraca.objects.filter(praca=praca.pk).exists()
+
+
 def test_return_five_nearest_pracas(client):
     """
     Retorna as cinco pracas mais proximas dado uma coordenada
@@ -344,6 +382,215 @@ def test_return_five_nearest_pracas(client):
             assert field in result
 
 
+def test_Pracas_mais_proximas_sem_consultas_por_resultado(client):
+    """
+    Testa que a consulta das Praças mais próximas não realiza uma consulta
+    por Praça retornada, mesmo quando elas possuem gestor.
+    """
+
+    data = {'lat': -15.7833, 'long': -47.9167}
+    for i in range(2):
+        mommy.make('Gestor', atual=True,
+                   praca=mommy.make(Praca, _fill_optional=['lat', 'long']))
+
+    url = reverse('pracas:distancia') + '?k=10'
+    client.post(url, data, format='json')
+    with CaptureQueriesContext(connection) as poucas:
+        client.post(url, data, format='json')
+
+    for i in range(8):
+        mommy.make('Gestor', atual=True,
+                   praca=mommy.make(Praca, _fill_optional=['lat', 'long']))
+
+    client.post(url, data, format='json')
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, data, format='json')
+
+    assert len(response.data) == 10
+    assert len(queries) == len(poucas)
+
+
+def test_return_nearest_pracas_within_radius(client):
+    """
+    Retorna as Praças mais próximas limitadas pela quantidade e pelo raio
+    """
+
+    data = {'lat': -15.7833, 'long': -47.9167}
+    proximas = [mommy.make(Praca, lat=-15.78 - i / 100, long=-47.92)
+                for i in range(3)]
+    mommy.make(Praca, lat=-3.1, long=-60.0)
+
+    response = client.post(
+        reverse('pracas:distancia') + '?raio=50', data, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [praca['id_pub'] for praca in response.data] == [
+        str(praca.pk) for praca in proximas]
+
+    response = client.post(
+        reverse('pracas:distancia') + '?k=1', data, format='json')
+
+    assert [praca['id_pub'] for praca in response.data] == [
+        str(proximas[0].pk)]
+
+    response = client.post(
+        reverse('pracas:distancia') + '?k=0', data, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_nearest_pracas_after_moving_a_praca(client):
+    """
+    Retorna a Praça mais próxima após a alteração das suas coordenadas
+    """
+
+    data = {'lat': -15.7833, 'long': -47.9167}
+    praca = mommy.make(Praca, lat=-3.1, long=-60.0)
+    mommy.make(Praca, lat=-23.5, long=-46.6)
+
+    response = client.post(
+        reverse('pracas:distancia') + '?k=1', data, format='json')
+    assert response.data[0]['id_pub'] != str(praca.pk)
+
+    praca.lat, praca.long = -15.8, -47.9
+    praca.save()
+
+    response = client.post(
+        reverse('pracas:distancia') + '?k=1', data, format='json')
+    assert response.data[0]['id_pub'] == str(praca.pk)
+
+
+def test_geodesic_distance_of_nearest_pracas(client):
+    """
+    Retorna as distâncias calculadas no elipsoide próximas das calculadas
+    na esfera
+    """
+
+    data = {'lat': -15.7833, 'long': -47.9167}
+    mommy.make(Praca, lat=-15.6, long=-47.7)
+    mommy.make(Praca, lat=-16.7, long=-49.3)
+
+    esfera = client.post(reverse('pracas:distancia'), data, format='json')
+    elipsoide = client.post(
+        reverse('pracas:distancia') + '?geodesica=1', data, format='json')
+
+    assert len(elipsoide.data) == 2
+    for praca, referencia in zip(elipsoide.data, esfera.data):
+        assert praca['id_pub'] == referencia['id_pub']
+        assert abs(praca['distancia'] - referencia['distancia']) < (
+            referencia['distancia'] * 0.01)
+
+
+@override_settings(DISTANCIA_GRID=0.1)
+def test_nearest_pracas_using_GET(client):
+    """
+    Retorna as Praças mais próximas através de GET, com o mesmo resultado
+    em cache para as coordenadas da mesma célula da grade
+    """
+
+    praca = mommy.make(Praca, lat=-15.8, long=-47.9)
+    mommy.make(Praca, lat=-3.1, long=-60.0)
+
+    response = client.get(reverse('pracas:distancia'),
+                          {'lat': -15.71, 'long': -47.91, 'k': 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data[0]['id_pub'] == str(praca.pk)
+    assert 'max-age' in response['Cache-Control']
+    assert 'public' in response['Cache-Control']
+
+    with CaptureQueriesContext(connection) as queries:
+        vizinha = client.get(reverse('pracas:distancia'),
+                             {'lat': -15.79, 'long': -47.99, 'k': 1})
+    assert len(queries) == 0
+    assert vizinha.data == response.data
+
+    praca.lat, praca.long = -3.0, -60.1
+    praca.save()
+
+    response = client.get(reverse('pracas:distancia'),
+                          {'lat': -15.71, 'long': -47.91, 'k': 1})
+    assert response.data[0]['id_pub'] != str(praca.pk)
+
+
+def test_nearest_pracas_with_invalid_origin(client):
+    """
+    Retorna erro quando a coordenada de origem for inválida ou estiver fora
+    dos limites de latitude e longitude
+    """
+
+    for origem in ({'lat': 'inf', 'long': -47.9}, {'lat': 'nan', 'long': 0},
+                   {'lat': -15.8, 'long': 181}, {'lat': -15.8}):
+        response = client.get(reverse('pracas:distancia'), origem)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(reverse('pracas:distancia'), origem,
+                               format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for limites in ({'raio': 'inf'}, {'raio': 'nan'}, {'raio': -1},
+                    {'k': 0}):
+        response = client.get(reverse('pracas:distancia'),
+                              dict(limites, lat=-15.8, long=-47.9))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_nearest_pracas_for_many_origins(client):
+    """
+    Retorna as Praças mais próximas de cada uma das origens informadas
+    """
+
+    brasilia = mommy.make(Praca, lat=-15.8, long=-47.9)
+    manaus = mommy.make(Praca, lat=-3.1, long=-60.0)
+    mommy.make(Praca, lat=-23.5, long=-46.6)
+
+    data = {'origens': [
+        {'id': 'escola', 'lat': -15.7833, 'long': -47.9167},
+        {'id': 'cras', 'lat': -3.0, 'long': -60.1},
+    ]}
+    response = client.post(reverse('pracas:distancia-lote') + '?k=2',
+                           data=json.dumps(data),
+                           content_type='application/json')
+    resultado = json.loads(
+        b''.join(response.streaming_content).decode('utf-8'))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [origem['id'] for origem in resultado] == ['escola', 'cras']
+    assert len(resultado[0]['pracas']) == 2
+    assert resultado[0]['pracas'][0]['id_pub'] == str(brasilia.pk)
+    assert resultado[1]['pracas'][0]['id_pub'] == str(manaus.pk)
+    assert (resultado[0]['pracas'][0]['distancia'] <=
+            resultado[0]['pracas'][1]['distancia'])
+
+
+def test_nearest_pracas_for_invalid_origins(client):
+    """
+    Retorna erro quando as origens informadas forem inválidas
+    """
+
+    response = client.post(reverse('pracas:distancia-lote'),
+                           data=json.dumps({'origens': [{'lat': -15.7}]}),
+                           content_type='application/json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for origem in ({'lat': 'nan', 'long': -47.9}, {'lat': -15.7, 'long': 'inf'},
+                   {'lat': 91, 'long': -47.9}):
+        response = client.post(reverse('pracas:distancia-lote'),
+                               data=json.dumps({'origens': [origem]}),
+                               content_type='application/json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for url, data in ((reverse('pracas:distancia-lote'), [{'lat': 0}]),
+                      (reverse('pracas:distancia-lote') + '?k=-1',
+                       {'origens': [{'lat': -15.7, 'long': -47.9}]})):
+        response = client.post(url, data=json.dumps(data),
+                               content_type='application/json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_defining_a_name_if_user_leave_it_blank(_admin_user, client):
     """
     Testa a situação onde um usuário deixa o nome da Praça em branco
@@ -751,7 +998,7 @@ def test_retorna_os_gg_de_uma_praca(client):
 
     response = client.get(_grupogestor_list(kwargs={'praca_pk': praca.pk}))
 
-    assert len(response.data) == 2
+    assert len(response.data['results']) == 2
 
 
 def test_retorna_qtde_membros_GG(client):
@@ -1180,3 +1427,945 @@ def test_propriedades_de_um_membro_UGL(client):
 
     for field in fields:
         assert field in response.data['unidade_gestora'][0]
+
+
+def test_paginacao_por_cursor_da_lista_de_Pracas(client):
+    """
+    Testa a navegação pela lista de Praças através do cursor, percorrendo
+    todas as páginas sem repetir ou perder registros e respeitando a
+    ordenação por UF e Municipio.
+    """
+
+    mommy.make(Praca, uf='df', municipio='Brasilia', _quantity=4)
+    mommy.make(Praca, uf='am', municipio='Manaus', _quantity=3)
+
+    response = client.get(_list() + '?page_size=2', format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 2
+    assert response.data['previous'] is None
+
+    pracas = list(response.data['results'])
+    while response.data['next']:
+        response = client.get(response.data['next'], format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['previous'] is not None
+        pracas.extend(response.data['results'])
+
+    assert len(pracas) == 7
+    assert len({praca['id_pub'] for praca in pracas}) == 7
+    assert [praca['uf'] for praca in pracas] == ['am'] * 3 + ['df'] * 4
+
+
+def test_cursor_invalido_na_lista_de_Pracas(client):
+    """
+    Testa a resposta da API ao receber um cursor inválido
+    """
+
+    mommy.make(Praca, _quantity=2)
+
+    response = client.get(_list() + '?cursor=invalido', format='json')
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    for posicao in (['df', 'Brasília'], ['df', 'Brasília', 'invalido'],
+                    {'uf': 'df'}):
+        cursor = b64encode(json.dumps({'p': posicao, 'r': 0}).encode('utf-8'))
+        response = client.get(_list(), {'cursor': cursor.decode('ascii')},
+                              format='json')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_lista_de_Pracas_com_gestao_atual_em_numero_fixo_de_consultas(client):
+    """
+    Testa se a quantidade de consultas ao banco para listar as Praças com
+    gestor e grupo gestor atuais independe da quantidade de Praças.
+    """
+
+    def _make_praca():
+        praca = mommy.make(Praca)
+        mommy.make('Gestor', praca=praca, atual=True)
+        grupo = mommy.make('GrupoGestor', praca=praca)
+        mommy.make('MembroGestor', grupo_gestor=grupo, _quantity=2)
+
+    _make_praca()
+    with CaptureQueriesContext(connection) as uma_praca:
+        response = client.get(_list(), format='json')
+    assert response.data['results'][0]['gestor'] is not None
+
+    for i in range(4):
+        _make_praca()
+    with CaptureQueriesContext(connection) as cinco_pracas:
+        response = client.get(_list(), format='json')
+
+    assert len(response.data['results']) == 5
+    assert len(cinco_pracas) == len(uma_praca)
+
+
+def test_detalhe_da_Praca_dentro_do_limite_de_consultas(client):
+    """
+    Testa se o detalhe de uma Praça com todas as suas coleções preenchidas
+    respeita o limite de consultas definido na view, carregando apenas os
+    registros ativos.
+    """
+
+    praca = mommy.make(Praca)
+    mommy.make('Gestor', praca=praca, atual=True)
+    grupo = mommy.make('GrupoGestor', praca=praca)
+    mommy.make('MembroGestor', grupo_gestor=grupo, _quantity=3)
+    mommy.make('ImagemPraca', praca=praca, _quantity=3)
+    mommy.make('Parceiro', praca=praca, _quantity=3)
+    mommy.make('MembroUgl', praca=praca, _quantity=3)
+    mommy.make('Ator', praca=praca, _quantity=3)
+    mommy.make('Rh', praca=praca, _quantity=3)
+    mommy.make('Rh', praca=praca, _fill_optional=['data_saida'])
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(_detail(kwargs={'pk': praca.pk}), format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['rh']) == 3
+    assert len(response.data['grupo_gestor']['membros']) == 3
+    assert len(queries) <= PracaViewSet.query_budget['retrieve']
+
+    # Sem o cache de respostas, para medir o carregamento completo
+    cache.clear()
+    with override_settings(QUERY_BUDGET_CHECK=True):
+        response = client.get(_detail(kwargs={'pk': praca.pk}), format='json')
+
+    assert 0 < int(response['X-Query-Count']) <= len(queries)
+
+
+def test_lista_de_Pracas_dentro_do_limite_de_consultas(client):
+    """
+    Testa se a listagem de Praças, a partir do resumo ou com campos que
+    exigem a gestão atual, respeita o limite de consultas definido na view
+    independentemente da quantidade de Praças.
+    """
+
+    for i in range(5):
+        praca = mommy.make(Praca)
+        mommy.make('Gestor', praca=praca, atual=True)
+        grupo = mommy.make('GrupoGestor', praca=praca)
+        mommy.make('MembroGestor', grupo_gestor=grupo, _quantity=2)
+
+    budget = PracaViewSet.query_budget['list']
+    for params in ('', '?expand=gestor', '?fields=nome,gestor,grupo_gestor'):
+        with override_settings(QUERY_BUDGET_CHECK=True):
+            response = client.get(_list() + params, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 5
+        assert 0 < int(response['X-Query-Count']) <= budget
+
+
+def test_lista_de_Pracas_com_campos_selecionados(client):
+    """
+    Testa o retorno apenas dos campos solicitados através do parâmetro
+    `fields`, sem carregar do banco as colunas que não serão exibidas.
+    """
+
+    mommy.make(Praca, _fill_optional=['lat', 'long', 'bio'], _quantity=3)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(_list() + '?fields=id_pub,nome,lat,long',
+                              format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 3
+    for praca in response.data['results']:
+        assert set(praca) == {'id_pub', 'nome', 'lat', 'long'}
+
+    assert len(queries) == 1
+    assert '"bio"' not in queries[0]['sql']
+    assert '"telefone1"' not in queries[0]['sql']
+
+
+def test_lista_de_Pracas_com_referencias_e_expansao(client):
+    """
+    Testa o retorno apenas da referência ao gestor na listagem de Praças e a
+    inclusão dos seus dados quando solicitado através do parâmetro `expand`.
+    """
+
+    praca = mommy.make(Praca)
+    gestor = mommy.make('Gestor', praca=praca, atual=True)
+
+    response = client.get(_list(), format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0]['gestor'] == gestor.pk
+
+    response = client.get(_list() + '?expand=gestor', format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0]['gestor']['id_pub'] == str(gestor.pk)
+    assert response.data['results'][0]['gestor']['praca'] == praca.pk
+
+    # Fora do resumo, o gestor é serializado a partir do próprio registro
+    completo = client.get(
+        _list() + '?fields=gestor,grupo_gestor&expand=gestor', format='json')
+
+    resumo = json.loads(response.content.decode('utf-8'))
+    completo = json.loads(completo.content.decode('utf-8'))
+    assert resumo['results'][0]['gestor'] == completo['results'][0]['gestor']
+
+
+def test_lista_de_Pracas_atualizada_apos_mudanca_de_gestor(client):
+    """
+    Testa se a listagem de Praças, servida pelo resumo, reflete as alterações
+    na Praça, no gestor atual e nos dados do usuário gestor.
+    """
+
+    praca = mommy.make(Praca, nome='Praca Antiga')
+    gestor = mommy.make('Gestor', praca=praca, atual=True)
+
+    praca.nome = 'Praca Nova'
+    praca.save()
+    gestor.user.full_name = 'Gestor Renomeado'
+    gestor.user.save()
+
+    response = client.get(_list() + '?expand=gestor', format='json')
+
+    assert response.data['results'][0]['nome'] == 'Praca Nova'
+    assert response.data['results'][0]['gestor']['nome'] == 'Gestor Renomeado'
+
+    gestor.delete()
+    response = client.get(_list(), format='json')
+
+    assert response.data['results'][0]['gestor'] is None
+
+
+def test_lista_de_Pracas_mantida_apos_login_do_gestor():
+    """
+    Testa que a gravação de campos do usuário gestor que não são exibidos no
+    resumo, como o último login, não altera a versão da Praça.
+    """
+
+    gestor = mommy.make('Gestor', praca=mommy.make(Praca), atual=True,
+                        user=mommy.make(User, full_name='Gestor'))
+    versao = Praca.objects.get(pk=gestor.praca_id).updated_at
+
+    update_last_login(None, gestor.user)
+    gestor.user.save()
+
+    assert Praca.objects.get(pk=gestor.praca_id).updated_at == versao
+
+    gestor.user.email = 'gestor@exemplo.gov.br'
+    gestor.user.save()
+
+    assert Praca.objects.get(pk=gestor.praca_id).updated_at > versao
+
+
+def test_comando_de_reconstrucao_do_resumo_de_Pracas():
+    """
+    Testa a reconstrução integral do resumo de Praças pelo comando
+    `rebuild_praca_summary`.
+    """
+
+    pracas = mommy.make(Praca, _quantity=3)
+    ResumoPraca.objects.all().delete()
+
+    call_command('rebuild_praca_summary')
+
+    assert set(ResumoPraca.objects.values_list('praca', flat=True)) == {
+        praca.pk for praca in pracas}
+
+
+def test_busca_textual_de_Pracas_sem_acentos(client):
+    """
+    Testa a busca de Praças ignorando acentos e ordenando os resultados por
+    relevância, com o nome da Praça à frente do municipio.
+    """
+
+    no_nome = mommy.make(Praca, nome='Praça CEU Goiânia Norte',
+                         municipio='Aparecida de Goiânia', uf='go')
+    no_municipio = mommy.make(Praca, nome='Praça CEU Setor Leste',
+                              municipio='Goiânia', uf='go')
+    mommy.make(Praca, nome='Praça CEU Manaus', municipio='Manaus', uf='am')
+
+    response = client.get(_list() + '?search=goiania', format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [praca['id_pub'] for praca in response.data['results']] == [
+        str(no_nome.pk), str(no_municipio.pk)]
+
+
+def test_paginacao_da_busca_textual_de_Pracas(client):
+    """
+    Testa a paginação por cursor dos resultados da busca ordenados por
+    relevância, com Praças de mesma relevância, sem repetir ou omitir
+    registros.
+    """
+
+    pracas = [mommy.make(Praca, nome='Praça CEU Goiânia {}'.format(numero),
+                         municipio='Goiânia', uf='go')
+              for numero in range(4)]
+    pracas += [mommy.make(Praca, nome='Praça CEU Setor {}'.format(numero),
+                          municipio='Goiânia', uf='go')
+               for numero in range(3)]
+
+    url = _list() + '?search=goiania&page_size=2'
+    vistas = []
+    while url:
+        response = client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        vistas.extend(praca['id_pub'] for praca in response.data['results'])
+        url = response.data['next']
+
+    assert sorted(vistas) == sorted(str(praca.pk) for praca in pracas)
+    assert set(vistas[:4]) == {str(praca.pk) for praca in pracas[:4]}
+
+def test_autocomplete_de_Pracas_por_municipio_e_bairro(client):
+    """
+    Testa as sugestões de Praças por trechos do municipio ou do bairro,
+    retornando apenas os campos de exibição e ordenadas por similaridade.
+    """
+
+    recife = mommy.make(Praca, municipio='Recife', uf='pe')
+    mommy.make(Praca, municipio='Olinda', bairro='Recife Antigo', uf='pe')
+    mommy.make(Praca, municipio='Manaus', uf='am')
+
+    response = client.get(_autocomplete() + '?q=recife', format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 2
+    assert response.data[0]['id_pub'] == recife.pk
+    assert set(response.data[0]) == {'id_pub', 'nome', 'municipio', 'uf'}
+
+    response = client.get(_autocomplete() + '?q=recife&limit=1',
+                          format='json')
+
+    assert len(response.data) == 1
+
+
+def test_detalhe_da_Praca_com_requisicao_condicional(client):
+    """
+    Testa a resposta 304 para o detalhe de uma Praça não alterada desde a
+    última requisição, sem carregar a Praça, e a mudança do ETag quando um
+    registro relacionado for alterado.
+    """
+
+    praca = mommy.make(Praca)
+    url = _detail(kwargs={'pk': praca.pk})
+
+    response = client.get(url, format='json')
+    etag = response['ETag']
+
+    assert response.status_code == status.HTTP_200_OK
+    assert 'Last-Modified' in response
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert len(queries) <= 1
+
+    mommy.make('Rh', praca=praca)
+    response = client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+def test_lista_de_Pracas_com_requisicao_condicional(client):
+    """
+    Testa o ETag agregado da listagem de Praças, alterado quando uma Praça é
+    incluída na lista.
+    """
+
+    mommy.make(Praca, _quantity=2)
+
+    response = client.get(_list(), format='json')
+    etag = response['ETag']
+
+    response = client.get(_list(), format='json', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    mommy.make(Praca)
+    response = client.get(_list(), format='json', HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['results']) == 3
+
+
+def test_detalhe_da_Praca_servido_pelo_cache_de_respostas(client):
+    """
+    Testa se o detalhe de uma Praça é servido pelo cache sem consultas ao
+    banco e invalidado quando um registro relacionado for alterado.
+    """
+
+    praca = mommy.make(Praca)
+    url = _detail(kwargs={'pk': praca.pk})
+
+    response = client.get(url, format='json')
+    assert response.status_code == status.HTTP_200_OK
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, format='json')
+
+    assert cached.status_code == status.HTTP_200_OK
+    assert cached.content == response.content
+    assert len(queries) == 0
+
+    mommy.make('Ator', praca=praca, nome='Novo Ator')
+
+    response = client.get(url, format='json')
+    assert 'Novo Ator' in response.content.decode('utf-8')
+
+
+def test_perfis_do_cache_de_respostas():
+    """
+    Testa se as respostas em cache são separadas entre usuários anônimos,
+    autenticados, administradores e os gestores de cada Praça.
+    """
+
+    gestor = mommy.make('Gestor', praca=mommy.make(Praca), atual=True)
+    outro = mommy.make('Gestor', praca=mommy.make(Praca), atual=True)
+    usuarios = [AnonymousUser(), mommy.make(get_user_model()),
+                mommy.make(get_user_model(), is_staff=True), gestor.user,
+                outro.user]
+
+    view = PracaViewSet()
+    perfis = []
+    for usuario in usuarios:
+        view.request = SimpleNamespace(user=usuario)
+        perfis.append(view.get_cache_role())
+
+    assert len(set(perfis)) == len(usuarios)
+    assert perfis[3] == 'gestor:{}'.format(gestor.praca.pk)
+
+
+def test_detalhe_da_Praca_pre_renderizado(client, settings, tmpdir):
+    """
+    Testa o detalhe de uma Praça servido a partir do JSON pré-renderizado
+    pelo comando `prerender_pracas`, compactado quando o cliente aceita
+    gzip, com um ETag por codificação e idêntico ao detalhe serializado a
+    cada requisição.
+    """
+
+    settings.API_BASE_URL = 'http://testserver'
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmpdir),
+    }}
+
+    praca = mommy.make(Praca)
+    mommy.make('Rh', praca=praca, _quantity=2)
+    mommy.make('ImagemPraca', praca=praca)
+    url = _detail(kwargs={'pk': praca.pk})
+
+    call_command('prerender_pracas', workers=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert len(queries) <= 1
+
+    serializado = client.get(url + '?format=json')
+
+    assert json.loads(gzip.decompress(response.content).decode('utf-8')) == \
+        json.loads(serializado.content.decode('utf-8'))
+
+    identidade = client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+
+    assert not identidade.has_header('Content-Encoding')
+    assert identidade['ETag'] != response['ETag']
+    assert json.loads(identidade.content.decode('utf-8')) == \
+        json.loads(serializado.content.decode('utf-8'))
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                          HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='identity',
+                          HTTP_IF_NONE_MATCH=identidade['ETag'])
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@override_settings(API_BASE_URL='http://testserver')
+def test_pre_renderizacao_exige_cache_compartilhado():
+    """
+    Testa que o comando `prerender_pracas` recusa o cache em memória local,
+    invisível para o servidor.
+    """
+
+    with pytest.raises(CommandError):
+        call_command('prerender_pracas', workers=1)
+
+
+def test_mapa_de_Pracas_em_geojson(client):
+    """
+    Testa a FeatureCollection com as Praças georreferenciadas e a mudança do
+    ETag apenas quando a localização ou as propriedades exibidas mudarem.
+    """
+
+    praca = mommy.make(Praca, lat=-15.793889, long=-47.882778)
+    mommy.make(Praca, lat=None, long=None)
+
+    response = client.get(_geojson())
+    geojson = json.loads(response.content.decode('utf-8'))
+    etag = response['ETag']
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(geojson['features']) == 1
+    assert geojson['features'][0]['geometry']['coordinates'] == [
+        -47.882778, -15.793889]
+    assert set(geojson['features'][0]['properties']) == {
+        'id_pub', 'nome', 'situacao', 'modelo', 'uf'}
+
+    response = client.get(_geojson(), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    praca.bio = 'Nova descrição'
+    praca.save()
+    assert client.get(_geojson())['ETag'] == etag
+
+    praca.lat = -15.8
+    praca.save()
+    assert client.get(_geojson())['ETag'] != etag
+
+
+def test_clusters_do_mapa_por_nivel_de_zoom(client):
+    """
+    Testa o agrupamento de Praças e Atores em clusters de acordo com o zoom
+    e a atualização dos clusters quando um ponto é movido.
+    """
+
+    praca = mommy.make(Praca, lat=-15.79, long=-47.88)
+    mommy.make('Ator', praca=praca, lat=-15.80, long=-47.90)
+    mommy.make(Praca, lat=-3.10, long=-60.02)
+    mommy.make(Praca, lat=-23.55, long=-46.63)
+
+    response = client.get(_clusters() + '?zoom=4')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(cluster['quantidade'] for cluster in response.data) == [
+        1, 1, 2]
+
+    response = client.get(
+        _clusters() + '?zoom=4&bbox=-50,-20,-45,-10')
+    assert len(response.data) == 1
+    assert response.data[0]['tipos'] == {'praca': 1, 'ator': 1}
+
+    praca.lat, praca.long = -3.11, -60.03
+    praca.save()
+
+    response = client.get(
+        _clusters() + '?zoom=4&bbox=-50,-20,-45,-10')
+    assert response.data[0]['tipos'] == {'ator': 1}
+
+    response = client.get(
+        _clusters() + '?zoom=4&bbox=-61,-4,-59,-2')
+    assert response.data[0]['tipos'] == {'praca': 2}
+
+    # As células sem pontos movidos continuam em cache
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            _clusters() + '?zoom=4&bbox=-47,-24,-46,-23')
+    assert response.data[0]['tipos'] == {'praca': 1}
+    assert len(queries) == 0
+
+
+def test_clusters_do_mapa_com_parametros_invalidos(client):
+    """
+    Testa a resposta da API ao receber uma bbox inválida
+    """
+
+    response = client.get(_clusters() + '?zoom=2&bbox=1,2,3')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(_clusters() + '?zoom=2&bbox=-inf,2,3,nan')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(
+        _clusters() + '?zoom=14&bbox=-1e300,-1e300,1e300,1e300')
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_estatisticas_nacionais_de_Pracas(client):
+    """
+    Testa os totais de Praças e repasses agrupados por UF e o total de
+    Praças com gestão vigente, calculados em uma única consulta e
+    atualizados após a inclusão de um gestor.
+    """
+
+    praca = mommy.make(Praca, uf='df', repasse=100)
+    mommy.make(Praca, uf='df', repasse=50)
+    mommy.make(Praca, uf='am', repasse=25)
+    mommy.make('GrupoGestor', praca=praca)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(_estatisticas())
+
+    assert len(queries) == 1
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['total'] == 3
+    assert response.data['repasse'] == 175
+    assert response.data['com_gestor'] == 0
+    assert response.data['com_grupo_gestor'] == 1
+    assert {(uf['uf'], uf['total'], uf['repasse'])
+            for uf in response.data['uf']} == {('df', 2, 150), ('am', 1, 25)}
+
+    mommy.make('Gestor', praca=praca, atual=True)
+
+    response = client.get(_estatisticas())
+    assert response.data['com_gestor'] == 1
+
+
+def test_exportacao_de_Pracas_em_csv(_admin_user, client):
+    """
+    Testa a exportação do cadastro de Praças em CSV com as descrições do
+    modelo e da situação.
+    """
+
+    mommy.make(Praca, modelo='m', situacao='i', _quantity=3)
+
+    response = client.get(_exportar())
+    linhas = b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'].startswith('text/csv')
+    assert len(linhas) == 4
+    assert '3000m2' in linhas[1]
+    assert 'Inaugurada' in linhas[1]
+
+
+def test_exportacao_de_Pracas_sem_credenciais(client):
+    """
+    Testa a exportação do cadastro de Praças sem credenciais de
+    administrador.
+    """
+
+    response = client.get(_exportar())
+
+    assert response.status_code in (status.HTTP_401_UNAUTHORIZED,
+                                    status.HTTP_403_FORBIDDEN)
+
+
+def test_carga_de_Pracas_a_partir_de_csv(tmpdir, capsys):
+    """
+    Testa a carga de Praças em lote, atualizando as existentes pelo número
+    de contrato, mantendo os valores das células vazias (exceto com
+    `--overwrite`) e rejeitando as linhas inválidas.
+    """
+
+    existente = mommy.make(Praca, contrato=1, nome='Praça Antiga', uf='df',
+                           municipio='Brasília', regiao='CO', modelo='p',
+                           situacao='a')
+    sem_nome = mommy.make(Praca, contrato=4, nome='Praça Mantida', uf='rs',
+                          municipio='Porto Alegre', regiao='S', modelo='p',
+                          situacao='a', lat=-30.03, long=-51.23)
+    slug = sem_nome.slug
+
+    arquivo = tmpdir.join('pracas.csv')
+    arquivo.write_text(
+        'contrato,nome,regiao,uf,municipio,modelo,situacao,lat,long\n'
+        '1,Praça Nova,CO,DF,Brasília,m,i,-15.7,-47.9\n'
+        '2,,N,AM,Manaus,p,a,,\n'
+        '3,,XX,SP,São Paulo,p,a,,\n'
+        '2,,N,AM,Manaus,p,a,,\n'
+        '4,,S,RS,Porto Alegre,m,i,,\n',
+        encoding='utf-8')
+
+    call_command('load_pracas', str(arquivo))
+    saida = capsys.readouterr().out
+
+    existente.refresh_from_db()
+    sem_nome.refresh_from_db()
+    nova = Praca.objects.get(contrato=2)
+
+    assert Praca.objects.count() == 3
+    assert existente.nome == 'Praça Nova'
+    assert existente.slug == 'praca-nova'
+    assert existente.situacao == 'i'
+    assert sem_nome.nome == 'Praça Mantida'
+    assert sem_nome.slug == slug
+    assert sem_nome.situacao == 'i'
+    assert float(sem_nome.lat) == -30.03
+    assert nova.nome == 'Praça CEU de Manaus - AM'
+    assert nova.slug == 'praca-ceu-de-manaus-am'
+    assert ResumoPraca.objects.filter(praca=nova).exists()
+    assert 'manaus' in nova.search_vector
+    assert '1 praças incluídas, 2 atualizadas' in saida
+    assert 'linha 4' in saida
+    assert 'linha 5' in saida
+
+    call_command('load_pracas', str(arquivo), overwrite=True)
+    sem_nome.refresh_from_db()
+
+    assert sem_nome.lat is None
+    assert sem_nome.nome == 'Praça Mantida'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_exportacao_de_entidades_em_ndjson(tmpdir):
+    """
+    Testa a exportação das entidades em arquivos NDJSON compactados,
+    divididos em blocos, com o total de registros no manifesto e sem a
+    senha dos usuários.
+    """
+
+    pracas = mommy.make(Praca, _quantity=3)
+    usuario = mommy.make(get_user_model(), password='segredo')
+
+    call_command('export_ndjson', str(tmpdir), '--workers', '1',
+                 '--chunk-size', '2')
+
+    manifesto = json.loads(tmpdir.join('manifest.json').read())
+    modelo = manifesto['modelos']['pracas.Praca']
+
+    assert modelo['registros'] == 3
+    assert [arquivo['registros'] for arquivo in modelo['arquivos']] == [2, 1]
+    assert manifesto['modelos']['authentication.User']['registros'] == 1
+
+    exportadas = []
+    for arquivo in modelo['arquivos']:
+        with gzip.open(str(tmpdir.join(arquivo['arquivo'])), 'rt',
+                       encoding='utf-8') as linhas:
+            exportadas.extend(json.loads(linha) for linha in linhas)
+
+    assert sorted(praca['pk'] for praca in exportadas) == sorted(
+        str(praca.pk) for praca in pracas)
+    assert exportadas[0]['model'] == 'pracas.praca'
+    assert 'nome' in exportadas[0]['fields']
+
+    arquivo, = manifesto['modelos']['authentication.User']['arquivos']
+    with gzip.open(str(tmpdir.join(arquivo['arquivo'])), 'rt',
+                   encoding='utf-8') as linhas:
+        exportado, = [json.loads(linha) for linha in linhas]
+
+    assert exportado['pk'] == str(usuario.pk)
+    assert 'password' not in exportado['fields']
+    assert exportado['fields']['email'] == usuario.email
+
+
+def test_carga_de_fixtures_em_lote(tmpdir, capsys):
+    """
+    Testa a carga de fixtures em lote, respeitando as dependências entre os
+    modelos e reconstruindo os dados derivados das Praças.
+    """
+
+    praca = '00017b57-ef37-4836-b174-32aee5427b13'
+    fixture = tmpdir.join('fixture.json')
+    fixture.write_text(json.dumps([
+        {'model': 'pracas.parceiro',
+         'pk': '0a84ed1d-c026-42ef-9f8a-7ccd5a90c96a',
+         'fields': {'nome': 'Parceiro', 'praca': praca, 'ramo_atividade': 2,
+                    'endereco': 'Rua', 'contato': 'Contato',
+                    'telefone': 12345678, 'email': 'parceiro@exemplo.com',
+                    'acoes': 'Ações', 'tempo_parceria': 12}},
+        {'model': 'pracas.praca', 'pk': praca,
+         'fields': {'nome': 'Praça Ceus Brasilia - DF', 'contrato': 1,
+                    'slug': 'praca-ceus-brasilia-df', 'regiao': 'CO',
+                    'uf': 'df', 'municipio': 'Brasília', 'modelo': 'g',
+                    'situacao': 'a', 'header_img': ''}},
+    ]), encoding='utf-8')
+
+    call_command('load_fixtures', str(fixture))
+    call_command('load_fixtures', str(fixture))
+    saida = capsys.readouterr().out
+
+    assert Praca.objects.count() == 1
+    assert Praca.objects.get().parceiros.count() == 1
+    assert ResumoPraca.objects.filter(praca=praca).exists()
+    assert 'brasil' in Praca.objects.get().search_vector
+    assert 'pracas.Praca: 0 incluídos, 1 já existentes' in saida
+
+
+def test_lista_Pracas_dentro_de_um_raio(client):
+    """
+    Testa a listagem das Praças dentro do raio informado, ordenadas pela
+    distância e paginadas.
+    """
+
+    proximas = [mommy.make(Praca, lat=-15.78 - i / 100, long=-47.92)
+                for i in range(3)]
+    mommy.make(Praca, lat=-3.1, long=-60.0)
+    mommy.make(Praca, lat=None, long=None)
+
+    params = '?lat=-15.7833&long=-47.9167&raio_km=50'
+    response = client.get(_list() + params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [praca['id_pub'] for praca in response.data['results']] == [
+        str(praca.pk) for praca in proximas]
+
+    response = client.get(_list() + params + '&page_size=2')
+    pagina = client.get(response.data['next'])
+
+    assert [praca['id_pub'] for praca in pagina.data['results']] == [
+        str(proximas[2].pk)]
+
+
+def test_lista_Pracas_com_raio_invalido(client):
+    """
+    Testa a listagem de Praças com parâmetros de proximidade inválidos
+    """
+
+    response = client.get(_list() + '?lat=-15.7833&raio_km=50')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_lista_Parceiros_dentro_de_um_raio(client):
+    """
+    Testa a listagem dos Parceiros dentro do raio informado
+    """
+
+    praca = mommy.make(Praca)
+    proximo = mommy.make('Parceiro', praca=praca, lat=-15.79, long=-47.92)
+    mommy.make('Parceiro', praca=praca, lat=-3.1, long=-60.0)
+
+    response = client.get(_parceiros_list(kwargs={'praca_pk': praca.pk}) +
+                          '?lat=-15.7833&long=-47.9167&raio_km=10')
+
+    assert [parceiro['id_pub'] for parceiro in response.data['results']] == [
+        str(proximo.pk)]
+
+
+def test_distancias_de_atores_e_parceiros_ate_a_Praca(client):
+    """
+    Testa o cálculo da distância dos atores e parceiros até a sua Praça e
+    até a Praça mais próxima, atualizado quando as coordenadas mudam.
+    """
+
+    praca = mommy.make(Praca, lat=-15.8, long=-47.9)
+    outra = mommy.make(Praca, lat=-3.1, long=-60.0)
+    ator = mommy.make('Ator', praca=praca, lat=-15.81, long=-47.9)
+    parceiro = mommy.make('Parceiro', praca=praca, lat=-3.11, long=-60.0)
+
+    ator.refresh_from_db()
+    parceiro.refresh_from_db()
+
+    assert 1000 < ator.distancia_praca < 1200
+    assert ator.praca_mais_proxima == praca
+    assert parceiro.distancia_praca > 1000000
+    assert parceiro.praca_mais_proxima == outra
+    assert 1000 < parceiro.distancia_praca_mais_proxima < 1200
+
+    outra.lat, outra.long = -15.81, -47.91
+    outra.save()
+
+    ator.refresh_from_db()
+    assert ator.praca_mais_proxima == outra
+
+
+def test_distancias_mantidas_apos_alteracao_sem_mudar_coordenadas(client):
+    """
+    Testa que as distâncias dos atores só são recalculadas quando as
+    coordenadas da Praça forem alteradas.
+    """
+
+    praca = mommy.make(Praca, lat=-15.8, long=-47.9)
+    ator = mommy.make('Ator', praca=praca, lat=-15.81, long=-47.9)
+    Ator.objects.filter(pk=ator.pk).update(distancia_praca=1)
+
+    praca = Praca.objects.get(pk=praca.pk)
+    praca.nome = 'Praça Renomeada'
+    praca.save()
+
+    ator.refresh_from_db()
+    assert ator.distancia_praca == 1
+
+    praca.lat = '-15.82'
+    praca.save()
+
+    ator.refresh_from_db()
+    assert 1000 < ator.distancia_praca < 1200
+
+
+def test_relatorio_de_abrangencia_da_Praca(client):
+    """
+    Testa o relatório de abrangência da Praça a partir das distâncias dos
+    seus atores e parceiros.
+    """
+
+    praca = mommy.make(Praca, lat=-15.8, long=-47.9)
+    for lat in (-15.81, -15.85, -15.9, -16.0):
+        mommy.make('Ator', praca=praca, lat=lat, long=-47.9)
+    mommy.make('Ator', praca=praca, lat=None, long=None)
+
+    response = client.get(_abrangencia(kwargs={'pk': praca.pk}))
+    atores = response.data['atores']
+
+    assert response.status_code == status.HTTP_200_OK
+    assert atores['total'] == 5
+    assert atores['georreferenciados'] == 4
+    assert atores['ate_5km'] == 1
+    assert atores['ate_10km'] == 2
+    assert atores['ate_20km'] == 3
+    assert 22000 < atores['maxima'] < 23000
+    assert response.data['parceiros']['total'] == 0
+
+    mommy.make('Ator', praca=praca, lat=-15.8, long=-47.9)
+
+    response = client.get(_abrangencia(kwargs={'pk': praca.pk}))
+    assert response.data['atores']['ate_5km'] == 2
+
+
+def test_geohash_das_Pracas_atores_e_parceiros(client):
+    """
+    Testa o geohash calculado a partir das coordenadas e o preenchimento
+    pelo comando `backfill_geohash`.
+    """
+
+    praca = mommy.make(Praca, lat=-15.7833, long=-47.9167)
+    ator = mommy.make('Ator', praca=praca, lat=None, long=None)
+
+    assert praca.geohash == '6vjyjwspe'
+    assert ator.geohash is None
+
+    Praca.objects.filter(pk=praca.pk).update(geohash=None)
+    call_command('backfill_geohash')
+
+    praca.refresh_from_db()
+    assert praca.geohash == '6vjyjwspe'
+
+
+def test_pontos_proximos_de_uma_coordenada(client):
+    """
+    Testa a busca de Praças, atores e parceiros próximos de uma coordenada,
+    ordenados pela distância.
+    """
+
+    praca = mommy.make(Praca, lat=-15.80, long=-47.92)
+    ator = mommy.make('Ator', praca=praca, lat=-15.79, long=-47.92)
+    parceiro = mommy.make('Parceiro', praca=praca, lat=-15.82, long=-47.92)
+    mommy.make(Praca, lat=-3.1, long=-60.0)
+    mommy.make('Ator', praca=praca, lat=-15.95, long=-47.92)
+
+    response = client.get(reverse('pracas:proximidade'), {
+        'lat': -15.7833, 'long': -47.9167, 'raio_km': 5})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [(ponto['tipo'], ponto['id_pub']) for ponto in response.data] == [
+        ('ator', ator.pk), ('praca', praca.pk), ('parceiro', parceiro.pk)]
+    assert response.data[0]['praca'] == praca.pk
+
+
+def test_pontos_proximos_com_raio_invalido(client):
+    """
+    Testa a busca de pontos próximos com um raio acima do permitido
+    """
+
+    response = client.get(reverse('pracas:proximidade'), {
+        'lat': -15.7833, 'long': -47.9167, 'raio_km': 500})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    for parametros in ({'raio_km': 'nan'}, {'raio_km': 'inf'},
+                       {'lat': 'nan'}, {'long': 'inf'}, {'limite': 0}):
+        response = client.get(reverse('pracas:proximidade'), dict({
+            'lat': -15.7833, 'long': -47.9167}, **parametros))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
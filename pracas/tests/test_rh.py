@@ -132,8 +132,8 @@ def test_retorna_a_lista_de_rh_de_uma_Praca(client):
         _list(kwargs={'praca_pk': praca.pk}), content_type="application/json")
 
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response.data, list)
-    assert len(response.data) == 5
+    assert isinstance(response.data['results'], list)
+    assert len(response.data['results']) == 5
 
 
 def test_retorna_a_lista_de_rh_ao_consultar_uma_Praca(client):
@@ -297,7 +297,7 @@ def test_retorna_a_lista_completa_de_RH_da_Praca(client):
         _list(kwargs={'praca_pk': praca.pk}), content_type="application/json")
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 8
+    assert len(response.data['results']) == 8
 
 
 def test_exclui_o_registro_de_vinculo_de_RH(_common_user, client):
@@ -4,6 +4,14 @@ from rest_framework_nested import routers
 
 from .views import PracaViewSet
 from .views import DistanceView
+from .views import DistanceBatchView
+from .views import ProximidadeView
+from .views import AutocompleteView
+from .views import GeoJsonView
+from .views import ClusterView
+from .views import EstatisticasView
+from .views import ExportView
+from .views import AbrangenciaView
 from .views import GrupoGestorViewSet
 from .views import MembroGestorViewSet
 from .views import MembroUglViewSet
@@ -41,6 +49,15 @@ ator_router = routers.NestedSimpleRouter(router, r'pracas', lookup='praca')
 ator_router.register(r'atores', AtorViewSet)
 
 urlpatterns = [
+    url(r'^pracas/autocomplete/$', AutocompleteView.as_view(),
+        name='praca-autocomplete'),
+    url(r'^pracas/geojson/$', GeoJsonView.as_view(), name='praca-geojson'),
+    url(r'^pracas/clusters/$', ClusterView.as_view(), name='praca-clusters'),
+    url(r'^pracas/estatisticas/$', EstatisticasView.as_view(),
+        name='praca-estatisticas'),
+    url(r'^pracas/exportar/$', ExportView.as_view(), name='praca-exportar'),
+    url(r'^pracas/(?P<pk>[^/.]+)/abrangencia/$', AbrangenciaView.as_view(),
+        name='praca-abrangencia'),
     url(r'^', include(router.urls)),
     url(r'^', include(imagem_router.urls)),
     url(r'^', include(parceiro_router.urls)),
@@ -50,4 +67,7 @@ urlpatterns = [
     url(r'^', include(rh_router.urls)),
     url(r'^', include(ator_router.urls)),
     url(r'^distancia/$', DistanceView.as_view(), name='distancia'),
+    url(r'^distancia/lote/$', DistanceBatchView.as_view(),
+        name='distancia-lote'),
+    url(r'^proximidade/$', ProximidadeView.as_view(), name='proximidade'),
 ]
@@ -1,17 +1,43 @@
+import csv
+import gzip
+import hashlib
+import json
+import math
+import uuid
+
+from collections import OrderedDict
 from datetime import date
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.db.models import Max
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
 
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from oidc_auth.authentication import JSONWebTokenAuthentication
 
+from core.cache import current_generations
+from core.http import accepts_gzip
+from core.views import ConditionalGetMixin
 from core.views import DefaultMixin
 from core.views import MultiSerializerViewSet
+from core.views import QueryBudgetMixin
+from core.views import ResponseCacheMixin
 from core.metadata import ChoicesMetadata
 
 from .models import Praca
@@ -22,9 +48,11 @@ from .models import ImagemPraca
 from .models import MembroUgl
 from .models import Rh
 from .models import Ator
+from .models import ResumoPraca
 
 from .serializers import PracaSerializer
 from .serializers import PracaListSerializer
+from .serializers import PracaResumoSerializer
 from .serializers import ImagemPracaSerializer
 from .serializers import DistanciaSerializer
 from .serializers import GrupoGestorSerializer
@@ -36,11 +64,47 @@ from .serializers import RhDetailSerializer
 from .serializers import RhListSerializer
 from .serializers import AtorDetailSerializer
 
+from . import spatial
+from .catchment import catchment_report
+from .clusters import clusters_in_bbox
+from .geojson import get_geojson
+from .proximity import nearby
+from .prerender import prerendered_response
+
 from .permissions import IsAdminOrManagerOrReadOnly
 from .permissions import IsOwnerOrReadOnly
 
 
-class PracaViewSet(DefaultMixin, MultiSerializerViewSet):
+def valid_coordinate(lat, long):
+    """
+    Retorna se a coordenada está dentro dos limites de latitude e longitude.
+    As comparações com NaN são falsas e também o rejeitam.
+    """
+    return -90 <= lat <= 90 and -180 <= long <= 180
+
+
+class PracaConditionalMixin(ConditionalGetMixin):
+    """
+    Utiliza a versão da Praça, atualizada a cada alteração dos seus
+    registros relacionados, nas requisições condicionais.
+    """
+    praca_url_kwarg = 'praca_pk'
+
+    def get_version(self):
+        pk = self.kwargs.get(self.praca_url_kwarg)
+        if pk is None:
+            return None
+
+        try:
+            updated_at = Praca.objects.filter(pk=pk).values_list(
+                'updated_at', flat=True).first()
+        except (ValueError, DjangoValidationError):
+            return None
+        return updated_at, ''
+
+
+class PracaViewSet(QueryBudgetMixin, PracaConditionalMixin,
+                   ResponseCacheMixin, DefaultMixin, MultiSerializerViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication, )
     permission_classes = (IsAdminOrManagerOrReadOnly, )
@@ -51,11 +115,91 @@ class PracaViewSet(DefaultMixin, MultiSerializerViewSet):
     search_fields = ('nome', 'municipio', 'uf')
 
     serializers = {
-        'list': PracaListSerializer,
+        'list': PracaResumoSerializer,
     }
 
+    query_budget = {
+        'list': 5,
+        'retrieve': 10,
+    }
+    praca_url_kwarg = 'pk'
+
+    @property
+    def search_vector_field(self):
+        if self.get_serializer_class() is PracaResumoSerializer:
+            return 'praca__search_vector'
+        return 'search_vector'
+
+    @property
+    def proximity_fields(self):
+        if self.get_serializer_class() is PracaResumoSerializer:
+            return ('praca__lat', 'praca__long')
+        return ('lat', 'long')
+
+    def get_version(self):
+        if self.action != 'list':
+            return super(PracaViewSet, self).get_version()
 
-class ImagemPracaViewSet(DefaultMixin, ModelViewSet):
+        field = 'updated_at'
+        if self.get_serializer_class() is PracaResumoSerializer:
+            field = 'praca__updated_at'
+
+        versao = self.filter_queryset(self.get_queryset()).aggregate(
+            updated_at=Max(field), total=Count('pk'))
+        return versao['updated_at'], versao['total']
+
+    def get_cache_generations(self):
+        if self.action == 'list':
+            return ['pracas']
+
+        try:
+            return ['praca:{}'.format(uuid.UUID(self.kwargs['pk']))]
+        except ValueError:
+            return None
+
+    def retrieve(self, request, *args, **kwargs):
+        response = prerendered_response(request, kwargs['pk'], self.etag)
+        if response is not None:
+            return get_conditional_response(
+                request, etag=response.get('ETag'),
+                last_modified=self.last_modified, response=response)
+        return super(PracaViewSet, self).retrieve(request, *args, **kwargs)
+
+    def use_summary(self):
+        """
+        Indica se a listagem pode ser servida pelo resumo desnormalizado,
+        ou seja, se os campos e expansões solicitados existem no resumo.
+        """
+        fields = self.get_requested_fields() or ()
+        expand = self.get_requested_expand() or {}
+        return (set(fields).issubset(PracaResumoSerializer.Meta.fields) and
+                set(expand).issubset(PracaResumoSerializer.expandable_fields)
+                and not any(expand.values()))
+
+    def get_serializer_class(self):
+        if self.action == 'list' and not self.use_summary():
+            # Campos que só existem no detalhe (ex.: lat/long para mapas)
+            # podem ser solicitados na listagem através do parâmetro `fields`
+            fields = self.get_requested_fields()
+            if fields and not set(fields).issubset(
+                    PracaListSerializer.Meta.fields):
+                return PracaSerializer
+            return PracaListSerializer
+        return super(PracaViewSet, self).get_serializer_class()
+
+    def get_queryset(self):
+        if self.get_serializer_class() is PracaResumoSerializer:
+            return ResumoPraca.objects.all()
+
+        queryset = super(PracaViewSet, self).get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None:
+            fields = self.get_serializer_class().Meta.fields
+        return queryset.for_fields(fields, self.get_requested_expand())
+
+
+class ImagemPracaViewSet(PracaConditionalMixin, DefaultMixin,
+                         ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
@@ -84,15 +228,11 @@ class ImagemPracaViewSet(DefaultMixin, ModelViewSet):
     def list(self, request, praca_pk=None):
         if not praca_pk:
             imagens = ImagemPraca.objects.all()
-            serializer = ImagemPracaSerializer(imagens, many=True)
-
-            return Response(serializer.data, status=200)
+            return self.list_response(imagens, ImagemPracaSerializer)
 
         praca = get_object_or_404(Praca, pk=praca_pk)
         imagens = praca.imagem.all()
-        serializer = ImagemPracaSerializer(imagens, many=True)
-
-        return Response(serializer.data, status=200)
+        return self.list_response(imagens, ImagemPracaSerializer)
 
     def partial_update(self, request, pk=None, praca_pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -110,28 +250,373 @@ class ImagemPracaViewSet(DefaultMixin, ModelViewSet):
 
 
 class DistanceView(DefaultMixin, APIView):
-    def post(self, request, latlong=None):
-        latlong = (request.data['lat'], request.data['long'])
-        distancias = sorted(
-            [(praca, praca.get_distance(latlong))
-             for praca in Praca.objects.all()],
-            key=lambda distancia: distancia[1])
-        pracas = [praca for (praca, distancia) in distancias[:5]]
+    """
+    Praças mais próximas da coordenada informada, limitadas à quantidade
+    (`?k=`, padrão 5) e ao raio em quilômetros (`?raio=`). Com
+    `?geodesica=1`, as distâncias dos resultados são calculadas no elipsoide.
+
+    Na consulta GET (`?lat=&long=`) a origem é aproximada para o centro da
+    sua célula na grade `DISTANCIA_GRID`, e o resultado de cada célula é
+    mantido em cache até a alteração de alguma Praça.
+    """
+    default_k = 5
+    max_k = 50
+
+    def get_origin(self, data):
+        try:
+            lat, long = float(data['lat']), float(data['long'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError('Informe lat e long válidos')
+
+        if not valid_coordinate(lat, long):
+            raise ValidationError('Informe lat e long válidos')
+        return lat, long
+
+    def get_limits(self, request):
+        message = 'Informe k=<n> e raio=<km> com valores positivos'
+        try:
+            raio = request.query_params.get('raio')
+            raio = float(raio) * 1000 if raio else None
+            k = request.query_params.get('k')
+            if k:
+                k = int(k)
+            else:
+                k = self.max_k if raio is not None else self.default_k
+        except ValueError:
+            raise ValidationError(message)
+
+        if k <= 0 or (raio is not None and not 0 <= raio < math.inf):
+            raise ValidationError(message)
+        return min(k, self.max_k), raio
+
+    def get_nearest(self, request, latlong, k, raio):
+        geodesica = request.query_params.get('geodesica') in ('1', 'true')
+        distancias = OrderedDict(spatial.index.nearest(
+            *latlong, k=k, radius=raio, geodesic=geodesica))
+        # As relações exibidas são carregadas em lote, como na listagem
+        pracas = Praca.objects.for_fields(
+            DistanciaSerializer.Meta.fields).in_bulk(list(distancias))
 
         serializer = DistanciaSerializer(
-            pracas, context={'origem': latlong,
-                             'request': request}, many=True)
+            [pracas[pk] for pk in distancias if pk in pracas],
+            context={'distancias': distancias, 'request': request}, many=True)
+        return serializer.data
+
+    def get(self, request):
+        lat, long = self.get_origin(request.query_params)
+        k, raio = self.get_limits(request)
+
+        grid = settings.DISTANCIA_GRID
+        cell = (math.floor(lat / grid), math.floor(long / grid))
+
+        # O resultado também depende dos dados exibidos de cada Praça
+        generations = current_generations(['coordenadas', 'pracas'])
+        key = 'distancia:{}:{}'.format(':'.join(generations), hashlib.md5(
+            '{}:{}:{}:{}:{}'.format(
+                request.build_absolute_uri('/'), cell, k, raio,
+                request.query_params.get('geodesica')).encode('utf-8')
+        ).hexdigest())
+
+        data = cache.get(key)
+        if data is None:
+            center = ((cell[0] + 0.5) * grid, (cell[1] + 0.5) * grid)
+            data = list(self.get_nearest(request, center, k, raio))
+            cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+        response = Response(data)
+        patch_cache_control(
+            response, public=True, max_age=settings.DISTANCIA_MAX_AGE)
+        return response
+
+    def post(self, request, latlong=None):
+        latlong = self.get_origin(request.data)
+        k, raio = self.get_limits(request)
+        return Response(self.get_nearest(request, latlong, k, raio))
+
+
+class DistanceBatchView(APIView):
+    """
+    Praças mais próximas de cada uma das origens informadas em `origens`
+    (lista de objetos com `lat`, `long` e, opcionalmente, `id`), limitadas
+    a `?k=` resultados por origem. As origens são avaliadas em blocos
+    vetorizados e o JSON é enviado à medida que os blocos são calculados.
+    """
+    default_k = 1
+    max_k = 10
+    max_origens = 5000
+    fields = ('id_pub', 'nome', 'municipio', 'uf')
+
+    def get_origens(self, request):
+        message = ('Informe em origens uma lista com até {} objetos com lat '
+                   'e long válidos'.format(self.max_origens))
+        origens = (request.data.get('origens')
+                   if isinstance(request.data, dict) else None)
+        if (not isinstance(origens, list) or
+                not 0 < len(origens) <= self.max_origens):
+            raise ValidationError(message)
+
+        try:
+            coordenadas = [(float(origem['lat']), float(origem['long']))
+                           for origem in origens]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(message)
+
+        if not all(valid_coordinate(*coordenada)
+                   for coordenada in coordenadas):
+            raise ValidationError(message)
+        return origens, coordenadas
+
+    def get_k(self, request):
+        try:
+            k = int(request.query_params.get('k', self.default_k))
+        except ValueError:
+            raise ValidationError('Informe k=<n> com um valor positivo')
+
+        if k <= 0:
+            raise ValidationError('Informe k=<n> com um valor positivo')
+        return min(k, self.max_k)
+
+    def post(self, request):
+        origens, coordenadas = self.get_origens(request)
+        k = self.get_k(request)
+
+        pracas = {praca['id_pub']: praca for praca in
+                  Praca.objects.exclude(lat=None).exclude(long=None).values(
+                      *self.fields)}
+
+        def results():
+            yield '['
+            nearest = spatial.index.nearest_many(coordenadas, k)
+            for index, (origem, (lat, long), resultados) in enumerate(
+                    zip(origens, coordenadas, nearest)):
+                item = {
+                    'id': origem.get('id'),
+                    'lat': lat,
+                    'long': long,
+                    'pracas': [dict(pracas[pk], distancia=round(distancia, -2))
+                               for pk, distancia in resultados
+                               if pk in pracas],
+                }
+                yield (',' if index else '') + json.dumps(
+                    item, cls=DjangoJSONEncoder, ensure_ascii=False)
+            yield ']'
+
+        return StreamingHttpResponse(results(),
+                                     content_type='application/json')
+
+
+class ProximidadeView(APIView):
+    """
+    Praças, atores e parceiros a até `?raio_km=` (padrão 5) da coordenada
+    informada (`?lat=&long=`), ordenados pela distância e limitados a
+    `?limite=` resultados.
+    """
+    default_raio_km = 5
+    max_raio_km = 50
+    default_limite = 50
+    max_limite = 200
+
+    def get(self, request):
+        params = request.query_params
+        message = ('Informe lat, long, raio_km=<até {} km> e limite=<n> '
+                   'válidos'.format(self.max_raio_km))
+        try:
+            lat, long = float(params['lat']), float(params['long'])
+            raio = float(params.get('raio_km', self.default_raio_km))
+            limite = int(params.get('limite', self.default_limite))
+        except (KeyError, ValueError):
+            raise ValidationError(message)
+
+        if not (valid_coordinate(lat, long) and
+                0 < raio <= self.max_raio_km and limite > 0):
+            raise ValidationError(message)
+
+        resultados = nearby(lat, long, raio * 1000,
+                            min(limite, self.max_limite))
+        for resultado in resultados:
+            resultado['distancia'] = round(resultado['distancia'], -2)
+        return Response(resultados)
+
+
+class AutocompleteView(APIView):
+    """
+    Sugestões de Praças para a caixa de busca (`?q=`), retornando apenas os
+    campos necessários para exibição.
+    """
+    query_param = 'q'
+    default_limit = 10
+    max_limit = 50
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        term = request.query_params.get(self.query_param, '').strip()
+        if not term:
+            return Response([])
+
+        pracas = Praca.objects.autocomplete(term).values(
+            'id_pub', 'nome', 'municipio', 'uf')
+
+        return Response(list(pracas[:self.get_limit(request)]))
+
+
+class GeoJsonView(APIView):
+    """
+    Localização de todas as Praças em GeoJSON para exibição no mapa
+    """
+
+    def get(self, request):
+        geojson = get_geojson()
+        content, etag = geojson['content'], geojson['etag']
+
+        if accepts_gzip(request):
+            response = HttpResponse(content,
+                                    content_type='application/geo+json')
+            response['Content-Encoding'] = 'gzip'
+            etag += '-gzip'
+        else:
+            response = HttpResponse(gzip.decompress(content),
+                                    content_type='application/geo+json')
+
+        response['ETag'] = quote_etag(etag)
+        response['Vary'] = 'Accept-Encoding'
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response)
+
+
+class ClusterView(APIView):
+    """
+    Agrupamento das Praças, Atores e Parceiros do mapa em clusters para o
+    nivel de zoom (`?zoom=`) e a área visivel
+    (`?bbox=long_min,lat_min,long_max,lat_max`).
+    """
+
+    def get(self, request):
+        message = 'Informe zoom=<n> e bbox=long_min,lat_min,long_max,lat_max'
+        try:
+            zoom = int(request.query_params.get('zoom', 0))
+            bbox = [float(value) for value in request.query_params.get(
+                'bbox', '-180,-90,180,90').split(',')]
+        except ValueError:
+            raise ValidationError(message)
+
+        if len(bbox) != 4 or not all(math.isfinite(value) for value in bbox):
+            raise ValidationError(message)
+
+        min_long, min_lat, max_long, max_lat = bbox
+        return Response(clusters_in_bbox(
+            zoom, max(min_long, -180), max(min_lat, -90),
+            min(max_long, 180), min(max_lat, 90)))
 
-        return Response(serializer.data)
 
+class EstatisticasView(APIView):
+    """
+    Totais nacionais de Praças e repasses, mantidos em cache até a próxima
+    alteração de uma Praça.
+    """
 
-class ParceiroViewSet(DefaultMixin, ModelViewSet):
+    def get(self, request):
+        # A listagem de Praças é invalidada pelas mesmas alterações que
+        # modificam as estatísticas
+        generation, = current_generations(['pracas'])
+        key = 'pracas-estatisticas:{}'.format(generation)
+
+        estatisticas = cache.get(key)
+        if estatisticas is None:
+            estatisticas = Praca.objects.statistics()
+            cache.set(key, estatisticas, settings.RESPONSE_CACHE_TIMEOUT)
+
+        return Response(estatisticas)
+
+
+class AbrangenciaView(APIView):
+    """
+    Relatório da distância dos atores e parceiros até a Praça, calculado a
+    partir das distâncias armazenadas e mantido em cache até a próxima
+    alteração da Praça ou dos seus registros.
+    """
+
+    def get(self, request, pk):
+        try:
+            pk = uuid.UUID(pk)
+        except ValueError:
+            raise Http404
+        praca = get_object_or_404(Praca, pk=pk)
+
+        generation, = current_generations(['praca:{}'.format(pk)])
+        key = 'praca-abrangencia:{}:{}'.format(pk, generation)
+
+        relatorio = cache.get(key)
+        if relatorio is None:
+            relatorio = catchment_report(praca)
+            cache.set(key, relatorio, settings.RESPONSE_CACHE_TIMEOUT)
+
+        return Response(relatorio)
+
+
+class Echo(object):
+    """
+    Objeto com a interface de arquivo que apenas devolve o que for escrito,
+    utilizado para gerar o CSV linha a linha.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ExportView(APIView):
+    """
+    Exportação do cadastro de Praças em CSV, gerado à medida que as linhas
+    são lidas do banco.
+    """
+    authentication_classes = (JSONWebTokenAuthentication, )
+    permission_classes = (IsAdminUser, )
+
+    fields = ('id_pub', 'nome', 'contrato', 'regiao', 'uf', 'municipio',
+              'bairro', 'logradouro', 'cep', 'modelo', 'situacao', 'repasse',
+              'data_inauguracao', 'lat', 'long', 'telefone1', 'email1')
+    display_fields = ('regiao', 'modelo', 'situacao')
+
+    def get_rows(self):
+        opts = Praca._meta
+        displays = [dict(opts.get_field(field).choices)
+                    if field in self.display_fields else None
+                    for field in self.fields]
+
+        yield [str(opts.get_field(field).verbose_name)
+               for field in self.fields]
+
+        # iterator() utiliza um cursor do lado do servidor, sem carregar
+        # todas as Praças em memória
+        rows = Praca.objects.order_by('uf', 'municipio', 'pk').values_list(
+            *self.fields).iterator()
+        for row in rows:
+            yield ['' if value is None else
+                   display.get(value, value) if display else value
+                   for value, display in zip(row, displays)]
+
+    def get(self, request):
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in self.get_rows()),
+            content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="pracas.csv"'
+        return response
+
+
+class ParceiroViewSet(PracaConditionalMixin, DefaultMixin, ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
 
     serializer_class = ParceiroDetailSerializer
     queryset = Parceiro.objects.all()
+    proximity_fields = ('lat', 'long')
 
     def create(self, request, praca_pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -145,7 +630,8 @@ class ParceiroViewSet(DefaultMixin, ModelViewSet):
             return Response(parceiro.errors, status=400)
 
 
-class GrupoGestorViewSet(DefaultMixin, ModelViewSet):
+class GrupoGestorViewSet(PracaConditionalMixin, DefaultMixin,
+                         ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
@@ -168,8 +654,7 @@ class GrupoGestorViewSet(DefaultMixin, ModelViewSet):
         praca = get_object_or_404(Praca, pk=praca_pk)
 
         gg = GrupoGestor.objects.filter(praca=praca)
-        serializer = GrupoGestorSerializer(gg, many=True)
-        return Response(serializer.data)
+        return self.list_response(gg, GrupoGestorSerializer)
 
     def destroy(self, request, praca_pk=None, pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -182,7 +667,8 @@ class GrupoGestorViewSet(DefaultMixin, ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class MembroGestorViewSet(DefaultMixin, ModelViewSet):
+class MembroGestorViewSet(PracaConditionalMixin, DefaultMixin,
+                          ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
@@ -209,8 +695,7 @@ class MembroGestorViewSet(DefaultMixin, ModelViewSet):
         gg = get_object_or_404(GrupoGestor, pk=grupogestor_pk, praca=praca)
 
         membros = MembroGestor.objects.filter(grupo_gestor=gg, data_desligamento=None)
-        serializer = MembroGestorDetailSerializer(membros, many=True)
-        return Response(serializer.data)
+        return self.list_response(membros, MembroGestorDetailSerializer)
 
     def partial_update(self, request, praca_pk=None, grupogestor_pk=None, pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -244,7 +729,7 @@ class MembroGestorViewSet(DefaultMixin, ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class MembroUglViewSet(DefaultMixin, ModelViewSet):
+class MembroUglViewSet(PracaConditionalMixin, DefaultMixin, ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
@@ -267,12 +752,10 @@ class MembroUglViewSet(DefaultMixin, ModelViewSet):
         praca = get_object_or_404(Praca, pk=praca_pk)
 
         ugl = MembroUgl.objects.filter(praca=praca)
-
-        serializer = MembroUglSerializer(ugl, many=True)
-        return Response(serializer.data)
+        return self.list_response(ugl, MembroUglSerializer)
 
 
-class RhViewSet(DefaultMixin, ModelViewSet):
+class RhViewSet(PracaConditionalMixin, DefaultMixin, ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
@@ -295,8 +778,7 @@ class RhViewSet(DefaultMixin, ModelViewSet):
         praca = get_object_or_404(Praca, pk=praca_pk)
 
         rhs = Rh.objects.filter(praca=praca)
-        serializer = RhDetailSerializer(rhs, many=True)
-        return Response(serializer.data)
+        return self.list_response(rhs, RhDetailSerializer)
 
     def partial_update(self, request, praca_pk=None, pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -337,13 +819,14 @@ class RhViewSet(DefaultMixin, ModelViewSet):
                                     status=status.HTTP_400_BAD_REQUEST)
 
 
-class AtorViewSet(DefaultMixin, ModelViewSet):
+class AtorViewSet(PracaConditionalMixin, DefaultMixin, ModelViewSet):
 
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (IsOwnerOrReadOnly,)
 
     serializer_class = AtorDetailSerializer
     queryset = Ator.objects.all()
+    proximity_fields = ('lat', 'long')
 
     def create(self, request, praca_pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
@@ -359,9 +842,8 @@ class AtorViewSet(DefaultMixin, ModelViewSet):
     def list(self, request, praca_pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)
 
-        atores = Ator.objects.filter(praca=praca)
-        serializer = AtorDetailSerializer(atores, many=True)
-        return Response(serializer.data)
+        atores = self.filter_queryset(Ator.objects.filter(praca=praca))
+        return self.list_response(atores, AtorDetailSerializer)
 
     def destroy(self, request, praca_pk=None, pk=None):
         praca = get_object_or_404(Praca, pk=praca_pk)